@@ -2,11 +2,32 @@
 Script to capture and analyze Elasticsearch response for model compatibility.
 """
 import json
+import sys
 from datetime import datetime
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+try:
+    import ijson
+except ImportError:  # pragma: no cover - ijson is optional
+    ijson = None
 from elasticsearch_client import elasticsearch_client
 from models import ElasticsearchQuery, ElasticsearchSearchResponse, ElasticsearchHit
 from config import config
 
+def iter_saved_hits(filename: str):
+    """Yield hits from a saved search response one at a time.
+    
+    Uses ijson so only one hit is in memory at once; falls back to loading
+    the whole file when ijson is not installed.
+    """
+    with open(filename, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, "hits.hits.item")
+        else:
+            yield from json.load(f)["hits"]["hits"]
+
 def capture_and_analyze_response():
     """Capture Elasticsearch response and analyze model compatibility."""
     print("=" * 60)
@@ -41,8 +62,19 @@ def capture_and_analyze_response():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"elasticsearch_response_{timestamp}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(response, f, indent=2, ensure_ascii=False, default=str)
+        # Encode once and write in a single call instead of json.dump's per-token writes.
+        # ObjectApiResponse is not a dict, so serialize its raw body.
+        raw_body = getattr(response, "body", response)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(
+                    raw_body,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(raw_body, indent=2, ensure_ascii=False, default=str))
         
         print(f"✅ Raw response saved to: {filename}")
         
@@ -55,27 +87,30 @@ def capture_and_analyze_response():
         print(f"Hits keys: {list(response['hits'].keys())}")
         print(f"Number of documents: {len(response['hits']['hits'])}")
         
-        # Analyze each document
-        for i, hit in enumerate(response['hits']['hits']):
-            print(f"\n--- DOCUMENT {i+1} ---")
-            print(f"Hit keys: {list(hit.keys())}")
-            print(f"_index: {hit.get('_index')}")
-            print(f"_id: {hit.get('_id')}")
-            print(f"_type: {hit.get('_type')}")
-            print(f"_score: {hit.get('_score')}")
-            
+        # Analyze each document, streamed back from the capture on disk
+        important_fields = ['@timestamp', 'event_name', 'camera_name', 'object_id', 'event_time']
+        for i, hit in enumerate(iter_saved_hits(filename)):
+            # Build each document's report and emit it with a single write
             source = hit.get('_source', {})
-            print(f"_source keys count: {len(source)}")
-            print(f"Sample _source keys: {list(source.keys())[:10]}...")
+            buf = [
+                f"\n--- DOCUMENT {i+1} ---",
+                f"Hit keys: {list(hit.keys())}",
+                f"_index: {hit.get('_index')}",
+                f"_id: {hit.get('_id')}",
+                f"_type: {hit.get('_type')}",
+                f"_score: {hit.get('_score')}",
+                f"_source keys count: {len(source)}",
+                f"Sample _source keys: {list(source.keys())[:10]}...",
+                "Important fields present:",
+            ]
             
             # Check for specific fields we care about
-            important_fields = ['@timestamp', 'event_name', 'camera_name', 'object_id', 'event_time']
-            print(f"Important fields present:")
             for field in important_fields:
                 if field in source:
-                    print(f"  ✅ {field}: {source[field]}")
+                    buf.append(f"  ✅ {field}: {source[field]}")
                 else:
-                    print(f"  ❌ {field}: MISSING")
+                    buf.append(f"  ❌ {field}: MISSING")
+            sys.stdout.write("\n".join(buf) + "\n")
         
         # Test model creation
         print("\n" + "=" * 60)
@@ -95,24 +130,20 @@ def capture_and_analyze_response():
             
             # Analyze each created document
             for i, doc in enumerate(documents):
-                print(f"\n--- CREATED DOCUMENT {i+1} ---")
-                print(f"Type: {type(doc)}")
-                print(f"Has _index: {hasattr(doc, '_index')}")
-                print(f"Has _id: {hasattr(doc, '_id')}")
-                print(f"Has _source: {hasattr(doc, '_source')}")
-                
-                if hasattr(doc, '_index'):
-                    print(f"_index value: {doc._index}")
-                if hasattr(doc, '_id'):
-                    print(f"_id value: {doc._id}")
-                if hasattr(doc, '_source'):
-                    source = doc._source
-                    if isinstance(source, dict):
-                        print(f"_source type: dict with {len(source)} keys")
-                        print(f"Sample _source keys: {list(source.keys())[:5]}")
-                    else:
-                        print(f"_source type: {type(source)}")
-                        print(f"_source value: {source}")
+                source = doc._source
+                buf = [
+                    f"\n--- CREATED DOCUMENT {i+1} ---",
+                    f"Type: {type(doc)}",
+                    f"_index value: {doc._index}",
+                    f"_id value: {doc._id}",
+                ]
+                if isinstance(source, dict):
+                    buf.append(f"_source type: dict with {len(source)} keys")
+                    buf.append(f"Sample _source keys: {list(source.keys())[:5]}")
+                else:
+                    buf.append(f"_source type: {type(source)}")
+                    buf.append(f"_source value: {source}")
+                sys.stdout.write("\n".join(buf) + "\n")
                 
         except Exception as e:
             print(f"❌ Model creation failed: {e}")
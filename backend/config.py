@@ -1,109 +1,241 @@
+import functools
 import os
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Optional
 from dotenv import load_dotenv
-from pydantic import BaseSettings, Field
 
 load_dotenv()
 
 
-class ElasticsearchConfig(BaseSettings):
+_MISSING = object()
+# Spellings pydantic accepted for booleans; anything else is a configuration error
+_TRUE_VALUES = {"1", "true", "yes", "on", "y", "t"}
+_FALSE_VALUES = {"0", "false", "no", "off", "n", "f"}
+
+
+def _env(name: str, default: Any = _MISSING) -> Any:
+    """Read an environment variable, failing loudly if a required one is unset."""
+    value = os.getenv(name)
+    if value is None:
+        if default is _MISSING:
+            raise ValueError(f"Missing required environment variable: {name}")
+        return default
+    return value
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(_env(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    normalized = value.strip().lower()
+    if normalized in _TRUE_VALUES:
+        return True
+    if normalized in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean for environment variable {name}: {value!r}")
+
+
+@dataclass(frozen=True)
+class ElasticsearchConfig:
     """Elasticsearch connection configuration."""
-    host: str = Field(default="localhost", env="ELASTICSEARCH_HOST")
-    port: int = Field(default=9200, env="ELASTICSEARCH_PORT")
-    username: Optional[str] = Field(default=None, env="ELASTICSEARCH_USERNAME")
-    password: Optional[str] = Field(default=None, env="ELASTICSEARCH_PASSWORD")
-    use_ssl: bool = Field(default=False, env="ELASTICSEARCH_USE_SSL")
-    verify_certs: bool = Field(default=False, env="ELASTICSEARCH_VERIFY_CERTS")
-    index: str = Field(default="logs", env="ELASTICSEARCH_INDEX")
-    
-    class Config:
-        env_file = ".env"
+    host: str = "localhost"
+    port: int = 9200
+    username: Optional[str] = None
+    password: Optional[str] = None
+    use_ssl: bool = False
+    verify_certs: bool = False
+    index: str = "logs"
+
+    @classmethod
+    def from_env(cls) -> "ElasticsearchConfig":
+        return cls(
+            host=_env("ELASTICSEARCH_HOST", cls.host),
+            port=_env_int("ELASTICSEARCH_PORT", cls.port),
+            username=_env("ELASTICSEARCH_USERNAME", cls.username),
+            password=_env("ELASTICSEARCH_PASSWORD", cls.password),
+            use_ssl=_env_bool("ELASTICSEARCH_USE_SSL", cls.use_ssl),
+            verify_certs=_env_bool("ELASTICSEARCH_VERIFY_CERTS", cls.verify_certs),
+            index=_env("ELASTICSEARCH_INDEX", cls.index),
+        )
 
 
-class FirebaseConfig(BaseSettings):
+@dataclass(frozen=True)
+class FirebaseConfig:
     """Firebase configuration."""
-    project_id: str = Field(env="FIREBASE_PROJECT_ID")
-    private_key_id: str = Field(env="FIREBASE_PRIVATE_KEY_ID")
-    private_key: str = Field(env="FIREBASE_PRIVATE_KEY")
-    client_email: str = Field(env="FIREBASE_CLIENT_EMAIL")
-    client_id: str = Field(env="FIREBASE_CLIENT_ID")
-    auth_uri: str = Field(default="https://accounts.google.com/o/oauth2/auth", env="FIREBASE_AUTH_URI")
-    token_uri: str = Field(default="https://oauth2.googleapis.com/token", env="FIREBASE_TOKEN_URI")
-    collection: str = Field(default="elasticsearch_data", env="FIREBASE_COLLECTION")
-    storage_bucket: str = Field(default="", env="FIREBASE_STORAGE_BUCKET")
-    
-    class Config:
-        env_file = ".env"
+    project_id: str
+    private_key_id: str
+    private_key: str
+    client_email: str
+    client_id: str
+    auth_uri: str = "https://accounts.google.com/o/oauth2/auth"
+    token_uri: str = "https://oauth2.googleapis.com/token"
+    collection: str = "elasticsearch_data"
+    storage_bucket: str = ""
+
+    @classmethod
+    def from_env(cls) -> "FirebaseConfig":
+        return cls(
+            project_id=_env("FIREBASE_PROJECT_ID"),
+            private_key_id=_env("FIREBASE_PRIVATE_KEY_ID"),
+            private_key=_env("FIREBASE_PRIVATE_KEY"),
+            client_email=_env("FIREBASE_CLIENT_EMAIL"),
+            client_id=_env("FIREBASE_CLIENT_ID"),
+            auth_uri=_env("FIREBASE_AUTH_URI", cls.auth_uri),
+            token_uri=_env("FIREBASE_TOKEN_URI", cls.token_uri),
+            collection=_env("FIREBASE_COLLECTION", cls.collection),
+            storage_bucket=_env("FIREBASE_STORAGE_BUCKET", cls.storage_bucket),
+        )
 
 
-class PipelineConfig(BaseSettings):
+@dataclass(frozen=True)
+class PipelineConfig:
     """Pipeline operation configuration."""
-    polling_interval_seconds: int = Field(default=30, env="POLLING_INTERVAL_SECONDS")
-    batch_size: int = Field(default=50, env="BATCH_SIZE")
-    max_retries: int = Field(default=3, env="MAX_RETRIES")
-    retry_delay_seconds: int = Field(default=5, env="RETRY_DELAY_SECONDS")
-    image_auth_url: str = Field(default="https://127.0.0.1/evolution/incident-response/authorize", env="IMAGE_AUTH_URL")
-    image_username: str = Field(default="Admin", env="IMAGE_USERNAME")
-    image_password: str = Field(default="test", env="IMAGE_PASSWORD")
-    image_base_url: str = Field(default="https://127.0.0.1/evolution/incident-response/image/main", env="IMAGE_BASE_URL")
-    storage_prefix: str = Field(default="events", env="STORAGE_PREFIX")
-    
-    class Config:
-        env_file = ".env"
+    polling_interval_seconds: int = 30
+    batch_size: int = 50
+    max_retries: int = 3
+    retry_delay_seconds: int = 5
+    image_auth_url: str = "https://127.0.0.1/evolution/incident-response/authorize"
+    image_username: str = "Admin"
+    image_password: str = "test"
+    image_base_url: str = "https://127.0.0.1/evolution/incident-response/image/main"
+    storage_prefix: str = "events"
+    image_fetch_concurrency: int = 16
+    upload_concurrency: int = 16
+    write_qps: int = 500
+    image_token_ttl_seconds: int = 600
+    parallel_upload_threshold: int = 16 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "PipelineConfig":
+        return cls(
+            polling_interval_seconds=_env_int("POLLING_INTERVAL_SECONDS", cls.polling_interval_seconds),
+            batch_size=_env_int("BATCH_SIZE", cls.batch_size),
+            max_retries=_env_int("MAX_RETRIES", cls.max_retries),
+            retry_delay_seconds=_env_int("RETRY_DELAY_SECONDS", cls.retry_delay_seconds),
+            image_auth_url=_env("IMAGE_AUTH_URL", cls.image_auth_url),
+            image_username=_env("IMAGE_USERNAME", cls.image_username),
+            image_password=_env("IMAGE_PASSWORD", cls.image_password),
+            image_base_url=_env("IMAGE_BASE_URL", cls.image_base_url),
+            storage_prefix=_env("STORAGE_PREFIX", cls.storage_prefix),
+            image_fetch_concurrency=_env_int("IMAGE_FETCH_CONCURRENCY", cls.image_fetch_concurrency),
+            upload_concurrency=_env_int("UPLOAD_CONCURRENCY", cls.upload_concurrency),
+            write_qps=_env_int("WRITE_QPS", cls.write_qps),
+            image_token_ttl_seconds=_env_int("IMAGE_TOKEN_TTL_SECONDS", cls.image_token_ttl_seconds),
+            parallel_upload_threshold=_env_int("PARALLEL_UPLOAD_THRESHOLD", cls.parallel_upload_threshold),
+        )
 
 
-class TwilioConfig(BaseSettings):
+@dataclass(frozen=True)
+class TwilioConfig:
     """Twilio SMS configuration."""
-    account_sid: str = Field(env="TWILIO_ACCOUNT_SID")
-    auth_token: str = Field(env="TWILIO_AUTH_TOKEN")
-    from_phone: str = Field(env="TWILIO_FROM_PHONE")
-    to_phone: str = Field(env="TWILIO_TO_PHONE")
-    enabled: bool = Field(default=True, env="TWILIO_SMS_ENABLED")
-    
-    class Config:
-        env_file = ".env"
+    account_sid: str
+    auth_token: str
+    from_phone: str
+    to_phone: str
+    enabled: bool = True
+    max_concurrency: int = 64
+    flush_interval_ms: int = 500
+    max_batch: int = 50
+    # Twilio's sending rate for the from number: 1 MPS for long codes, 3 for toll-free
+    mps: float = 1.0
+    mps_burst: int = 1
+    # Send through a Messaging Service number pool instead of from_phone when set
+    messaging_service_sid: Optional[str] = None
+    # Identical messages to the same recipient within this window are sent once (0 disables)
+    dedup_window_seconds: int = 60
+
+    @classmethod
+    def from_env(cls) -> "TwilioConfig":
+        return cls(
+            account_sid=_env("TWILIO_ACCOUNT_SID"),
+            auth_token=_env("TWILIO_AUTH_TOKEN"),
+            from_phone=_env("TWILIO_FROM_PHONE"),
+            to_phone=_env("TWILIO_TO_PHONE"),
+            enabled=_env_bool("TWILIO_SMS_ENABLED", cls.enabled),
+            max_concurrency=_env_int("TWILIO_MAX_CONCURRENCY", cls.max_concurrency),
+            flush_interval_ms=_env_int("TWILIO_FLUSH_INTERVAL_MS", cls.flush_interval_ms),
+            max_batch=_env_int("TWILIO_MAX_BATCH", cls.max_batch),
+            mps=_env_float("TWILIO_MPS", cls.mps),
+            mps_burst=_env_int("TWILIO_MPS_BURST", cls.mps_burst),
+            messaging_service_sid=_env("TWILIO_MESSAGING_SERVICE_SID", cls.messaging_service_sid),
+            dedup_window_seconds=_env_int("TWILIO_DEDUP_WINDOW_SECONDS", cls.dedup_window_seconds),
+        )
 
 
-class WhatsAppConfig(BaseSettings):
+@dataclass(frozen=True)
+class WhatsAppConfig:
     """Twilio WhatsApp configuration."""
-    account_sid: str = Field(env="TWILIO_ACCOUNT_SID")  # Same as SMS
-    auth_token: str = Field(env="TWILIO_AUTH_TOKEN")    # Same as SMS
-    from_number: str = Field(env="WHATSAPP_FROM_NUMBER")  # e.g., whatsapp:+14155238886
-    to_number: str = Field(env="WHATSAPP_TO_NUMBER")      # e.g., whatsapp:+14134665844
-    content_sid: str = Field(env="WHATSAPP_CONTENT_SID")  # Template SID
-    enabled: bool = Field(default=True, env="WHATSAPP_ENABLED")
-    
-    class Config:
-        env_file = ".env"
+    account_sid: str  # Same as SMS
+    auth_token: str   # Same as SMS
+    from_number: str  # e.g., whatsapp:+14155238886
+    to_number: str    # e.g., whatsapp:+14134665844
+    content_sid: str  # Template SID
+    enabled: bool = True
+    # Twilio allows 25 text messages per second per WhatsApp sender
+    mps: float = 25.0
+    max_concurrency: int = 25
+    # Template for batch alerts ({{1}} event count, {{2}} batch info); queued alerts are
+    # only coalesced into one batch alert when this is set
+    batch_content_sid: Optional[str] = None
+    # More queued alerts than this within one flush window go out as a single batch alert
+    coalesce_threshold: int = 3
+
+    @classmethod
+    def from_env(cls) -> "WhatsAppConfig":
+        return cls(
+            account_sid=_env("TWILIO_ACCOUNT_SID"),
+            auth_token=_env("TWILIO_AUTH_TOKEN"),
+            from_number=_env("WHATSAPP_FROM_NUMBER"),
+            to_number=_env("WHATSAPP_TO_NUMBER"),
+            content_sid=_env("WHATSAPP_CONTENT_SID"),
+            enabled=_env_bool("WHATSAPP_ENABLED", cls.enabled),
+            mps=_env_float("WHATSAPP_MPS", cls.mps),
+            max_concurrency=_env_int("WHATSAPP_MAX_CONCURRENCY", cls.max_concurrency),
+            batch_content_sid=_env("WHATSAPP_BATCH_CONTENT_SID", cls.batch_content_sid),
+            coalesce_threshold=_env_int("WHATSAPP_COALESCE_THRESHOLD", cls.coalesce_threshold),
+        )
 
 
-class LoggingConfig(BaseSettings):
+@dataclass(frozen=True)
+class LoggingConfig:
     """Logging configuration."""
-    log_level: str = Field(default="INFO", env="LOG_LEVEL")
-    log_file: str = Field(default="pipeline.log", env="LOG_FILE")
-    
-    class Config:
-        env_file = ".env"
+    log_level: str = "INFO"
+    log_file: str = "pipeline.log"
+
+    @classmethod
+    def from_env(cls) -> "LoggingConfig":
+        return cls(
+            log_level=_env("LOG_LEVEL", cls.log_level),
+            log_file=_env("LOG_FILE", cls.log_file),
+        )
 
 
 class Config:
     """Main configuration class that combines all config sections."""
     
     def __init__(self):
-        self.elasticsearch = ElasticsearchConfig()
-        self.firebase = FirebaseConfig()
-        self.pipeline = PipelineConfig()
-        self.twilio = TwilioConfig()
-        self.whatsapp = WhatsAppConfig()
-        self.logging = LoggingConfig()
+        self.elasticsearch = ElasticsearchConfig.from_env()
+        self.firebase = FirebaseConfig.from_env()
+        self.pipeline = PipelineConfig.from_env()
+        self.twilio = TwilioConfig.from_env()
+        self.whatsapp = WhatsAppConfig.from_env()
+        self.logging = LoggingConfig.from_env()
     
-    def get_elasticsearch_url(self) -> str:
-        """Get the complete Elasticsearch URL."""
+    @functools.cached_property
+    def _elasticsearch_url(self) -> str:
         protocol = "https" if self.elasticsearch.use_ssl else "http"
         return f"{protocol}://{self.elasticsearch.host}:{self.elasticsearch.port}"
     
-    def get_firebase_credentials(self) -> dict:
-        """Get Firebase credentials as a dictionary."""
+    @functools.cached_property
+    def _firebase_credentials(self) -> dict:
         return {
             "type": "service_account",
             "project_id": self.firebase.project_id,
@@ -114,6 +246,16 @@ class Config:
             "auth_uri": self.firebase.auth_uri,
             "token_uri": self.firebase.token_uri,
         }
+    
+    def get_elasticsearch_url(self) -> str:
+        """Get the complete Elasticsearch URL."""
+        return self._elasticsearch_url
+    
+    def get_firebase_credentials(self) -> dict:
+        """Get Firebase credentials as a dictionary."""
+        # Return a copy: credentials.Certificate requires a real dict and
+        # callers must not be able to mutate the cached one.
+        return dict(self._firebase_credentials)
 
 
 # Global config instance
@@ -1,11 +1,30 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Dict, Any, Optional, Union
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import NotFoundError, ConnectionError, RequestError
 from loguru import logger
 
 from config import config
 
+# Optional: decode search responses with orjson instead of the stdlib json module
+try:
+    import orjson
+    from elastic_transport import JsonSerializer
+
+    class OrjsonSerializer(JsonSerializer):
+        """JSON serializer for the Elasticsearch client backed by orjson."""
+
+        def loads(self, data: bytes) -> Any:
+            return orjson.loads(data)
+
+        def dumps(self, data: Any) -> bytes:
+            # Pre-encoded bodies pass through unchanged
+            if isinstance(data, (str, bytes)):
+                return super().dumps(data)
+            return orjson.dumps(data, default=self.default)
+except ImportError:
+    OrjsonSerializer = None
+
 
 class SimpleElasticsearchClient:
     """Simplified Elasticsearch client that works with raw dictionaries."""
@@ -13,9 +32,27 @@ class SimpleElasticsearchClient:
     def __init__(self):
         self.client: Optional[Elasticsearch] = None
         self.is_connected = False
+        
+        # Request skeleton reused by every get_recent_documents poll; only the
+        # index, size and cutoff change between calls (single polling caller).
+        self._recent_timestamp_range: Dict[str, Any] = {
+            "gte": None,
+            "format": "yyyy-MM-dd'T'HH:mm:ss"
+        }
+        self._recent_search_params: Dict[str, Any] = {
+            "index": None,
+            "body": {
+                "query": {"range": {"@timestamp": self._recent_timestamp_range}},
+                "size": None,
+                "sort": [{"@timestamp": {"order": "desc"}}]
+            }
+        }
     
     def connect(self) -> bool:
-        """Establish connection to Elasticsearch."""
+        """Establish connection to Elasticsearch (no-op if already connected)."""
+        if self.is_connected and self.client:
+            return True
+        
         try:
             connection_params = {
                 "hosts": [config.get_elasticsearch_url()],
@@ -24,6 +61,10 @@ class SimpleElasticsearchClient:
                 "timeout": 30,
                 "max_retries": 3,
                 "retry_on_timeout": True,
+                # Keep-alive pool sized for concurrent callers, gzip request bodies
+                "http_compress": True,
+                "connections_per_node": 25,
+                "sniff_on_start": False,
             }
             
             # Add authentication if provided
@@ -33,6 +74,9 @@ class SimpleElasticsearchClient:
                     config.elasticsearch.password
                 )
             
+            if OrjsonSerializer is not None:
+                connection_params["serializer"] = OrjsonSerializer()
+            
             self.client = Elasticsearch(**connection_params)
             
             # Test connection with a simple operation
@@ -48,7 +92,11 @@ class SimpleElasticsearchClient:
             return False
     
     def disconnect(self):
-        """Close connection to Elasticsearch."""
+        """Close connection to Elasticsearch.
+        
+        The client and its connection pool are shared process-wide; only call
+        this on shutdown, never per request.
+        """
         if self.client:
             self.client.close()
             self.is_connected = False
@@ -77,25 +125,14 @@ class SimpleElasticsearchClient:
         """Get documents from the last N minutes."""
         try:
             # Calculate timestamp for N minutes ago
-            cutoff_time = datetime.utcnow() - timedelta(minutes=minutes_back)
-            timestamp_str = cutoff_time.strftime("%Y-%m-%dT%H:%M:%S")
+            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes_back)
+            timestamp_str = cutoff_time.replace(tzinfo=None).isoformat(timespec="seconds")
             
-            # Build query for recent documents
-            search_params = {
-                "index": index_name,
-                "body": {
-                    "query": {
-                        "range": {
-                            "@timestamp": {
-                                "gte": timestamp_str,
-                                "format": "yyyy-MM-dd'T'HH:mm:ss"
-                            }
-                        }
-                    },
-                    "size": batch_size,
-                    "sort": [{"@timestamp": {"order": "desc"}}]
-                }
-            }
+            # Patch the dynamic fields of the prebuilt request in place
+            search_params = self._recent_search_params
+            search_params["index"] = index_name
+            search_params["body"]["size"] = batch_size
+            self._recent_timestamp_range["gte"] = timestamp_str
             
             response = self.client.search(**search_params)
             return response["hits"]["hits"]
@@ -109,50 +146,70 @@ class SimpleElasticsearchClient:
         index_name: str,
         batch_size: int = 100
     ) -> List[Dict[str, Any]]:
-        """Get all documents from an index using scroll API."""
+        """Get all documents from an index using a point-in-time and search_after."""
+        return list(self.iter_all_documents(index_name, batch_size))
+    
+    def iter_all_documents(
+        self,
+        index_name: str,
+        batch_size: int = 100,
+        keep_alive: str = "1m"
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield all documents from an index page by page without materializing them.
+        
+        keep_alive must cover the time the consumer spends on one page.
+        """
+        pit_id = None
         try:
-            # Use scroll API for large datasets
-            response = self.client.search(
-                index=index_name,
-                body={
+            pit_id = self.client.open_point_in_time(index=index_name, keep_alive=keep_alive)["id"]
+            search_after = None
+            
+            while True:
+                body = {
                     "query": {"match_all": {}},
-                    "size": batch_size
-                },
-                scroll="1m"
-            )
-            
-            documents = []
-            scroll_id = response.get("_scroll_id")
-            
-            # Process first batch
-            for hit in response["hits"]["hits"]:
-                documents.append(hit)
-            
-            # Continue scrolling
-            while scroll_id and len(response["hits"]["hits"]) > 0:
-                response = self.client.scroll(
-                    scroll_id=scroll_id,
-                    scroll="1m"
-                )
+                    "size": batch_size,
+                    "pit": {"id": pit_id, "keep_alive": keep_alive},
+                    "sort": [{"_shard_doc": "asc"}],
+                    "track_total_hits": False,
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
                 
-                for hit in response["hits"]["hits"]:
-                    documents.append(hit)
+                response = self.client.search(body=body)
+                hits = response["hits"]["hits"]
+                yield from hits
                 
-                scroll_id = response.get("_scroll_id")
-            
-            return documents
+                # The PIT id may be refreshed on every response
+                pit_id = response.get("pit_id", pit_id)
+                
+                if len(hits) < batch_size:
+                    break
+                search_after = hits[-1]["sort"]
             
         except (ConnectionError, RequestError) as e:
             logger.error(f"Failed to get all documents: {e}")
             raise
+        finally:
+            if pit_id:
+                try:
+                    self.client.close_point_in_time(body={"id": pit_id})
+                except Exception as e:
+                    logger.warning(f"Failed to close point in time: {e}")
     
     def search_documents(
         self,
         index_name: str,
-        query: Dict[str, Any],
+        query: Union[Dict[str, Any], List[Dict[str, Any]]],
         size: int = 100
-    ) -> List[Dict[str, Any]]:
-        """Search for documents in Elasticsearch."""
+    ) -> Union[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+        """Search for documents in Elasticsearch.
+        
+        A list of queries is sent as a single _msearch request and returns one
+        hit list per query.
+        """
+        if isinstance(query, list):
+            return self.msearch_documents(index_name, query, size)
+        
         try:
             if not self.client:
                 raise Exception("Elasticsearch client not connected")
@@ -172,6 +229,40 @@ class SimpleElasticsearchClient:
             logger.error(f"Failed to search documents: {e}")
             raise
     
+    def msearch_documents(
+        self,
+        index_name: str,
+        queries: List[Dict[str, Any]],
+        size: int = 100
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several queries in one _msearch round trip."""
+        try:
+            if not self.client:
+                raise Exception("Elasticsearch client not connected")
+            
+            if not queries:
+                return []
+            
+            body: List[Dict[str, Any]] = []
+            for query in queries:
+                body.append({"index": index_name})
+                body.append({"query": query, "size": size})
+            
+            response = self.client.msearch(body=body)
+            
+            results = []
+            for item in response["responses"]:
+                if "error" in item:
+                    logger.error(f"msearch sub-query failed: {item['error']}")
+                    results.append([])
+                else:
+                    results.append(item["hits"]["hits"])
+            return results
+            
+        except (ConnectionError, RequestError) as e:
+            logger.error(f"Failed to msearch documents: {e}")
+            raise
+    
     def count_documents(self, index_name: str, query: Dict[str, Any] = None) -> int:
         """Count documents in an index."""
         try:
@@ -1,10 +1,16 @@
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from loguru import logger
-from firebase_admin import firestore
+from firebase_admin import firestore, firestore_async
 from firebase_client import firebase_client
 
+# Statuses counted explicitly; anything else is reported as pending
+RESOLVED_STATUSES = ('accepted', 'rejected', 'done')
+VALID_STATUSES = frozenset(('pending',) + RESOLVED_STATUSES)
+
 
 class EventStatisticsService:
     
@@ -12,6 +18,7 @@ class EventStatisticsService:
         self.firebase_client = firebase_client
         self.events_collection = "event" 
         self.stats_collection = "event_statistics" 
+        self._async_db = None
     
     def calculate_event_statistics(self, date_filter: Optional[str] = None) -> Dict[str, Any]:
 
@@ -26,31 +33,15 @@ class EventStatisticsService:
             if date_filter:
                 query = self._apply_date_filter(query, date_filter)
             
-            # Get all documents
-            docs = query.stream()
-            
-            # Initialize counters
-            stats = {
-                'total': 0,
-                'pending': 0,
-                'accepted': 0,
-                'rejected': 0,
-                'done': 0,
-                'last_updated': datetime.utcnow(),
-                'date_filter': date_filter or 'all'
-            }
+            count_queries = self._build_count_queries(query)
+            with ThreadPoolExecutor(max_workers=len(count_queries)) as executor:
+                futures = {
+                    key: executor.submit(self._count, q)
+                    for key, q in count_queries.items()
+                }
+                counts = {key: future.result() for key, future in futures.items()}
             
-            # Count events by status
-            for doc in docs:
-                data = doc.to_dict() or {}
-                stats['total'] += 1
-                
-                status = data.get('status', 'pending').lower()
-                if status in stats:
-                    stats[status] += 1
-                else:
-                    # Handle unknown statuses
-                    stats['pending'] += 1
+            stats = self._build_stats(counts, date_filter)
             
             # logger.info(f"Calculated event statistics: {stats}")
             return stats
@@ -59,6 +50,87 @@ class EventStatisticsService:
             logger.error(f"Failed to calculate event statistics: {e}")
             return {}
     
+    async def calculate_event_statistics_async(self, date_filter: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of calculate_event_statistics using the Firestore async client."""
+        try:
+            if not self.firebase_client.is_initialized:
+                logger.error("Firebase client not initialized")
+                return {}
+            
+            if self._async_db is None:
+                self._async_db = firestore_async.client()
+            
+            query = self._async_db.collection(self.events_collection)
+            if date_filter:
+                query = self._apply_date_filter(query, date_filter)
+            
+            count_queries = self._build_count_queries(query)
+            values = await asyncio.gather(*(self._count_async(q) for q in count_queries.values()))
+            counts = dict(zip(count_queries.keys(), values))
+            
+            return self._build_stats(counts, date_filter)
+            
+        except Exception as e:
+            logger.error(f"Failed to calculate event statistics: {e}")
+            return {}
+    
+    async def refresh_all_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Calculate and store statistics for every date filter concurrently."""
+        date_filters = (None, "today", "week", "month")
+        results = await asyncio.gather(
+            *(self.calculate_event_statistics_async(f) for f in date_filters)
+        )
+        
+        all_stats = {
+            "current" if date_filter is None else date_filter: stats
+            for date_filter, stats in zip(date_filters, results)
+        }
+        await asyncio.to_thread(
+            self.store_statistics_batch,
+            {stats_id: stats for stats_id, stats in all_stats.items() if stats}
+        )
+        
+        return all_stats
+    
+    def _build_count_queries(self, query) -> Dict[str, Any]:
+        # Count server-side instead of streaming every document. Documents
+        # are written as "Pending" and statuses were historically compared
+        # case-insensitively, so match both spellings and derive pending
+        # (which also absorbs missing/unknown statuses) from the total.
+        count_queries = {'total': query}
+        for status in RESOLVED_STATUSES:
+            count_queries[status] = query.where(
+                filter=firestore.FieldFilter("status", "in", [status, status.capitalize()])
+            )
+        return count_queries
+    
+    def _tally(self, counts: Dict[str, int]) -> Dict[str, int]:
+        return {
+            'total': counts['total'],
+            'pending': counts['total'] - sum(counts[s] for s in RESOLVED_STATUSES),
+            'accepted': counts['accepted'],
+            'rejected': counts['rejected'],
+            'done': counts['done'],
+        }
+    
+    def _build_stats(self, counts: Dict[str, int], date_filter: Optional[str]) -> Dict[str, Any]:
+        return {
+            **self._tally(counts),
+            'last_updated': datetime.utcnow(),
+            'date_filter': date_filter or 'all'
+        }
+    
+    @staticmethod
+    def _count(query) -> int:
+        """Run a Firestore count() aggregation and return its value."""
+        result = query.count(alias="count").get()
+        return int(result[0][0].value)
+    
+    @staticmethod
+    async def _count_async(query) -> int:
+        result = await query.count(alias="count").get()
+        return int(result[0][0].value)
+    
     def _apply_date_filter(self, query, date_filter: str):
         try:
             now = datetime.utcnow()
@@ -102,6 +174,32 @@ class EventStatisticsService:
             logger.error(f"Failed to store event statistics: {e}")
             return False
     
+    def store_statistics_batch(self, items: Dict[str, Dict[str, Any]]) -> bool:
+        """Store several statistics documents in a single batched commit."""
+        try:
+            if not self.firebase_client.is_initialized:
+                logger.error("Firebase client not initialized")
+                return False
+            
+            if not items:
+                return True
+            
+            stored_at = datetime.utcnow()
+            collection = self.firebase_client.db.collection(self.stats_collection)
+            batch = self.firebase_client.db.batch()
+            for stats_id, stats in items.items():
+                stats['stored_at'] = stored_at
+                stats['collection'] = self.events_collection
+                batch.set(collection.document(stats_id), stats)
+            batch.commit()
+            
+            logger.info(f"Stored event statistics with IDs: {list(items)}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store event statistics batch: {e}")
+            return False
+    
     def get_statistics(self, stats_id: str = "current") -> Dict[str, Any]:
 
         try:
@@ -131,16 +229,15 @@ class EventStatisticsService:
                 logger.error("Firebase client not initialized")
                 return False
             
-            valid_statuses = ['pending', 'accepted', 'rejected', 'done']
-            if new_status.lower() not in valid_statuses:
-                logger.error(f"Invalid status: {new_status}. Valid statuses: {valid_statuses}")
+            if new_status.lower() not in VALID_STATUSES:
+                logger.error(f"Invalid status: {new_status}. Valid statuses: {sorted(VALID_STATUSES)}")
                 return False
             
             # Update the event
             doc_ref = self.firebase_client.db.collection(self.events_collection).document(event_id)
             doc_ref.update({
                 'status': new_status.lower(),
-                'status_updated_at': datetime.utcnow()
+                'status_updated_at': firestore.SERVER_TIMESTAMP
             })
             
             logger.info(f"Updated event {event_id} status to: {new_status}")
@@ -176,39 +273,34 @@ class EventStatisticsService:
                 logger.error("Firebase client not initialized")
                 return {}
             
-            daily_stats = {}
+            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            collection = self.firebase_client.db.collection(self.events_collection)
             
+            # Reduce server-side: one set of count() aggregations per day, all
+            # issued concurrently, instead of shipping and tallying documents
+            jobs = []
             for i in range(days):
-                date = datetime.utcnow() - timedelta(days=i)
-                date_str = date.strftime("%Y-%m-%d")
-                
-                # Calculate stats for this specific day
-                start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_of_day = start_of_day + timedelta(days=1)
-                
-                query = self.firebase_client.db.collection(self.events_collection).where(
+                start_of_day = today - timedelta(days=i)
+                date_str = start_of_day.strftime("%Y-%m-%d")
+                day_query = collection.where(
                     filter=firestore.FieldFilter("created_at", ">=", start_of_day)
                 ).where(
-                    filter=firestore.FieldFilter("created_at", "<", end_of_day)
+                    filter=firestore.FieldFilter("created_at", "<", start_of_day + timedelta(days=1))
                 )
-                
-                docs = query.stream()
-                day_stats = {
-                    'total': 0,
-                    'pending': 0,
-                    'accepted': 0,
-                    'rejected': 0,
-                    'done': 0
-                }
-                
-                for doc in docs:
-                    data = doc.to_dict() or {}
-                    day_stats['total'] += 1
-                    status = data.get('status', 'pending').lower()
-                    if status in day_stats:
-                        day_stats[status] += 1
-                
-                daily_stats[date_str] = day_stats
+                for key, count_query in self._build_count_queries(day_query).items():
+                    jobs.append((date_str, key, count_query))
+            
+            day_counts: Dict[str, Dict[str, int]] = {}
+            if jobs:
+                with ThreadPoolExecutor(max_workers=min(16, len(jobs))) as executor:
+                    values = executor.map(lambda job: self._count(job[2]), jobs)
+                    for (date_str, key, _), value in zip(jobs, values):
+                        day_counts.setdefault(date_str, {})[key] = value
+            
+            daily_stats = {
+                date_str: self._tally(counts)
+                for date_str, counts in day_counts.items()
+            }
             
             logger.info(f"Retrieved daily statistics for {days} days")
             return daily_stats
@@ -1,17 +1,141 @@
+import asyncio
 import json
-import time
 import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Union, Tuple
+from urllib.parse import quote
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 from firebase_admin.exceptions import FirebaseError
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import storage as gcs
+from google.cloud.firestore_v1.bulk_writer import BulkRetry, BulkWriterOptions
 from loguru import logger
-from PIL import Image, ImageDraw
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageColor, ImageDraw
 import io
 
 from config import config
 
+# Optional fast JPEG path: libjpeg-turbo for decode/encode, OpenCV for drawing.
+# Falls back to Pillow when either is missing.
+try:
+    import cv2
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    cv2 = None
+    _turbo_jpeg = None
+
+# Optional faster JSON encoding for values Firestore can't store natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JPEG_MAGIC = b"\xff\xd8"
+# Values Firestore stores natively without any nested check
+FIRESTORE_SCALAR_TYPES = (str, int, float, bool, datetime, type(None))
+_FIRESTORE_SCALAR_TYPE_SET = frozenset(FIRESTORE_SCALAR_TYPES)
+# Per-thread BytesIO reused for Pillow JPEG encodes (never truncated, so it keeps its capacity)
+_encode_buffers = threading.local()
+# Uploads above this size use a chunked resumable upload instead of one request
+SINGLE_SHOT_THRESHOLD = 8 * 1024 * 1024
+RESUMABLE_CHUNK_SIZE = 1024 * 1024  # must be a multiple of 256 KiB
+# Parts uploaded concurrently and composed for payloads above parallel_upload_threshold
+PARALLEL_UPLOAD_PARTS = 4
+# Keep-alive connections held for Storage uploads (upload threads plus composite parts)
+STORAGE_HTTP_POOL_SIZE = 32
+# How long a test_connection result is reused
+CONNECTION_CHECK_TTL_SECONDS = 5.0
+BBOX_PATTERN = re.compile(r"BBOX\s*\(\s*([^)]+)\)")
+
+# OpenCV draws in BGR order
+RECTANGLE_COLORS_BGR = {
+    "red": (0, 0, 255),
+    "green": (0, 255, 0),
+    "blue": (255, 0, 0),
+    "yellow": (0, 255, 255),
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+}
+
+
+def _dumps_fallback(value: Any) -> str:
+    """Serialize a value Firestore can't store natively into a JSON string."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value, default=str, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            pass
+    return json.dumps(value, default=str)
+
+
+def _sanitize_in_place(container: Union[Dict[Any, Any], List[Any]]) -> None:
+    """Replace values Firestore can't store with JSON strings, recursing into lists and dicts."""
+    pairs = container.items() if isinstance(container, dict) else enumerate(container)
+    for key, value in pairs:
+        value_type = type(value)
+        # Exact-type set lookup covers the common case without an MRO walk
+        if value_type in _FIRESTORE_SCALAR_TYPE_SET:
+            continue
+        if value_type is list or value_type is dict or isinstance(value, (list, dict)):
+            _sanitize_in_place(value)
+        elif not isinstance(value, FIRESTORE_SCALAR_TYPES):
+            container[key] = _dumps_fallback(value)
+
+
+@lru_cache(maxsize=4096)
+def _document_id(source_index: str, source_id: str) -> str:
+    """Firestore document ID for an Elasticsearch hit; cached since polling cycles overlap."""
+    return f"{source_index}_{source_id}"
+
+
+def prepare_document_for_firestore(doc_data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Stamp metadata and sanitize a document for Firestore."""
+    # Add metadata (one timestamp so created_at == updated_at)
+    doc_data["created_at"] = doc_data["updated_at"] = now
+    doc_data["status"] = "Pending"
+
+    # Single pass: nested lists/dicts are walked once and only values
+    # Firestore can't store are replaced with their JSON string
+    _sanitize_in_place(doc_data)
+    
+    return doc_data
+
+
+def _flatten_alpha(image: Image.Image) -> Image.Image:
+    """Composite an image with transparency onto a white background."""
+    rgba = image.convert("RGBA") if image.mode != "RGBA" else image
+    background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+    return Image.alpha_composite(background, rgba).convert("RGB")
+
+
+# Per-mode conversion to RGB used by draw_rectangle_on_image
+_MODE_HANDLERS = {
+    "RGB": lambda image: image,
+    "L": lambda image: image.convert("RGB"),
+    "RGBA": _flatten_alpha,
+    "LA": _flatten_alpha,
+    "P": _flatten_alpha,
+}
+
+
+def _color_to_bgr(color: str) -> Tuple[int, int, int]:
+    """Resolve a colour name to a BGR tuple, falling back to Pillow's colour table."""
+    bgr = RECTANGLE_COLORS_BGR.get(color)
+    if bgr is None:
+        red, green, blue = ImageColor.getrgb(color)[:3]
+        bgr = (blue, green, red)
+    return bgr
+
 
 class SimpleFirebaseClient:
     """Simplified Firebase client that works with raw dictionaries."""
@@ -19,6 +143,12 @@ class SimpleFirebaseClient:
     def __init__(self):
         self.app: Optional[firebase_admin.App] = None
         self.db: Optional[firestore.Client] = None
+        self.bucket = None
+        self._collection_ref = None
+        self._part_upload_pool: Optional[ThreadPoolExecutor] = None
+        self._part_upload_pool_lock = threading.Lock()
+        # (monotonic time of the last connectivity check, its result)
+        self._last_ping: Tuple[float, bool] = (0.0, False)
         self.is_initialized = False
     
     def initialize(self) -> bool:
@@ -37,9 +167,10 @@ class SimpleFirebaseClient:
             
             # Get Firestore client
             self.db = firestore.client()
-            # Initialize default storage bucket if configured
-            if config.firebase.storage_bucket:
-                storage.bucket(config.firebase.storage_bucket)
+            # Long-lived handle to the default events collection
+            self._collection_ref = self.db.collection(config.firebase.collection)
+            # Resolve the default storage bucket once and reuse it for every upload
+            self.bucket = self._create_bucket() if config.firebase.storage_bucket else None
             self.is_initialized = True
             
             logger.info(f"Firebase initialized for project: {config.firebase.project_id}")
@@ -50,6 +181,27 @@ class SimpleFirebaseClient:
             self.is_initialized = False
             return False
 
+    def _create_bucket(self):
+        """
+        Build the storage bucket on a google-cloud-storage client whose HTTP pool
+        is sized for concurrent uploads (the default pool keeps only 10 connections,
+        so busier upload threads would otherwise reconnect on every request).
+        """
+        try:
+            gcs_credentials = self.app.credential.get_credential()
+            http = AuthorizedSession(gcs_credentials)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=STORAGE_HTTP_POOL_SIZE)
+            http.mount("https://", adapter)
+            client = gcs.Client(
+                project=config.firebase.project_id,
+                credentials=gcs_credentials,
+                _http=http
+            )
+            return client.bucket(config.firebase.storage_bucket)
+        except Exception as e:
+            logger.warning(f"⚠️ Falling back to firebase_admin storage bucket: {e}")
+            return storage.bucket(config.firebase.storage_bucket)
+
     def parse_bbox_coordinates(self, bbox_string: str) -> Optional[Tuple[float, float, float, float]]:
         """
         Parse BBOX coordinates from string like 'BBOX (359.8,452.8,672.8,669.0)'
@@ -57,21 +209,19 @@ class SimpleFirebaseClient:
         """
         try:
             # Extract numbers from the BBOX string
-            pattern = r'BBOX\s*\(([^)]+)\)'
-            match = re.search(pattern, bbox_string.strip())
+            match = BBOX_PATTERN.search(bbox_string) if "BBOX" in bbox_string else None
             if not match:
                 logger.warning(f"Could not parse BBOX string: {bbox_string}")
                 return None
             
-            coords_str = match.group(1)
-            coords = [float(x.strip()) for x in coords_str.split(',')]
+            coords = tuple(map(float, match.group(1).split(',')))
             
             if len(coords) != 4:
                 logger.warning(f"Expected 4 coordinates, got {len(coords)}: {bbox_string}")
                 return None
             
             x1, y1, x2, y2 = coords
-            logger.info(f"Parsed BBOX coordinates: ({x1}, {y1}, {x2}, {y2})")
+            logger.debug(f"Parsed BBOX coordinates: ({x1}, {y1}, {x2}, {y2})")
             return (x1, y1, x2, y2)
             
         except Exception as e:
@@ -90,40 +240,26 @@ class SimpleFirebaseClient:
         Returns the modified image as bytes.
         """
         try:
+            # JPEG frames go through libjpeg-turbo + OpenCV when available
+            if _turbo_jpeg is not None and image_bytes[:2] == JPEG_MAGIC:
+                return self._draw_rectangle_turbo(
+                    image_bytes, bbox_coords, rectangle_color, rectangle_width
+                )
+            
             # Open image from bytes
             image = Image.open(io.BytesIO(image_bytes))
             
-            # Convert to RGB if necessary (for PNG with transparency)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Create a white background
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Normalize to RGB; plain RGB frames pass through without a copy
+            handler = _MODE_HANDLERS.get(image.mode)
+            image = handler(image) if handler else image.convert('RGB')
             
             # Get image dimensions
             img_width, img_height = image.size
             # logger.info(f"Image dimensions: {img_width}x{img_height}")
             
-            # Parse BBOX coordinates
-            x1, y1, x2, y2 = bbox_coords
+            x1, y1, x2, y2 = self._clamp_bbox(bbox_coords, img_width, img_height)
             
-            # Ensure coordinates are within image bounds
-            x1 = max(0, min(x1, img_width))
-            y1 = max(0, min(y1, img_height))
-            x2 = max(0, min(x2, img_width))
-            y2 = max(0, min(y2, img_height))
-            
-            # Ensure x2 > x1 and y2 > y1
-            if x2 <= x1:
-                x2 = x1 + 10  # Minimum width
-            if y2 <= y1:
-                y2 = y1 + 10  # Minimum height
-            
-            logger.info(f"Drawing rectangle at: ({x1}, {y1}) to ({x2}, {y2})")
+            logger.debug(f"Drawing rectangle at: ({x1}, {y1}) to ({x2}, {y2})")
             
             # Create drawing context
             draw = ImageDraw.Draw(image)
@@ -135,15 +271,67 @@ class SimpleFirebaseClient:
                 width=rectangle_width
             )
             
-            # Convert back to bytes
-            output = io.BytesIO()
+            # Encode into this thread's reusable buffer; once it has grown to
+            # frame size, later saves write in place without reallocating
+            output = getattr(_encode_buffers, "buffer", None)
+            if output is None:
+                output = _encode_buffers.buffer = io.BytesIO()
+            output.seek(0)
             image.save(output, format='JPEG', quality=95)
-            return output.getvalue()
+            with output.getbuffer() as view:
+                return bytes(view[:output.tell()])
             
         except Exception as e:
             logger.error(f"Error drawing rectangle on image: {e}")
             return image_bytes  # Return original image if processing fails
 
+    def _draw_rectangle_turbo(
+        self,
+        image_bytes: bytes,
+        bbox_coords: Tuple[float, float, float, float],
+        rectangle_color: str,
+        rectangle_width: int
+    ) -> bytes:
+        """Decode, draw and re-encode a JPEG with libjpeg-turbo and OpenCV."""
+        frame = _turbo_jpeg.decode(image_bytes, pixel_format=TJPF_BGR)
+        img_height, img_width = frame.shape[:2]
+        
+        x1, y1, x2, y2 = self._clamp_bbox(bbox_coords, img_width, img_height)
+        logger.debug(f"Drawing rectangle at: ({x1}, {y1}) to ({x2}, {y2})")
+        
+        cv2.rectangle(
+            frame,
+            (int(x1), int(y1)),
+            (int(x2), int(y2)),
+            _color_to_bgr(rectangle_color),
+            rectangle_width,
+            lineType=cv2.LINE_8
+        )
+        return _turbo_jpeg.encode(frame, quality=95, pixel_format=TJPF_BGR)
+
+    @staticmethod
+    def _clamp_bbox(
+        bbox_coords: Tuple[float, float, float, float],
+        img_width: int,
+        img_height: int
+    ) -> Tuple[float, float, float, float]:
+        """Clamp BBOX coordinates to the image and enforce a minimum size."""
+        x1, y1, x2, y2 = bbox_coords
+        
+        # Ensure coordinates are within image bounds (comparisons, not min/max calls)
+        x1 = 0 if x1 < 0 else img_width if x1 > img_width else x1
+        y1 = 0 if y1 < 0 else img_height if y1 > img_height else y1
+        x2 = 0 if x2 < 0 else img_width if x2 > img_width else x2
+        y2 = 0 if y2 < 0 else img_height if y2 > img_height else y2
+        
+        # Ensure x2 > x1 and y2 > y1
+        if x2 <= x1:
+            x2 = x1 + 10  # Minimum width
+        if y2 <= y1:
+            y2 = y1 + 10  # Minimum height
+        
+        return x1, y1, x2, y2
+
     def process_image_with_bbox(
         self,
         image_bytes: bytes,
@@ -156,20 +344,7 @@ class SimpleFirebaseClient:
         If image_position contains BBOX coordinates, draw a red rectangle.
         """
         try:
-            processed_bytes = image_bytes
-            
-            # Process image with BBOX if position data is available
-            if image_position and "BBOX" in image_position.upper():
-                logger.info(f"Processing image with BBOX: {image_position}")
-                bbox_coords = self.parse_bbox_coordinates(image_position)
-                
-                if bbox_coords:
-                    processed_bytes = self.draw_rectangle_on_image(image_bytes, bbox_coords)
-                    logger.info("Successfully drew rectangle on image")
-                else:
-                    logger.warning("Could not parse BBOX coordinates, uploading original image")
-            else:
-                logger.info("No BBOX coordinates found, uploading original image")
+            processed_bytes = self._decode_draw_encode(image_bytes, image_position)
             
             # Upload the processed image
             return self.upload_image_bytes(
@@ -183,6 +358,46 @@ class SimpleFirebaseClient:
             # Fallback to original upload method
             return self.upload_image_bytes(image_bytes, destination_path, content_type)
 
+    async def process_image_with_bbox_async(
+        self,
+        image_bytes: bytes,
+        image_position: Optional[str],
+        destination_path: str,
+        content_type: str = "image/jpeg"
+    ) -> dict:
+        """
+        Async variant of process_image_with_bbox.
+        Drawing and uploading run in worker threads so many images can be
+        in flight at once with asyncio.gather.
+        """
+        try:
+            processed_bytes = await asyncio.to_thread(
+                self._decode_draw_encode, image_bytes, image_position
+            )
+        except Exception as e:
+            logger.error(f"Error processing image with BBOX: {e}")
+            processed_bytes = image_bytes
+        
+        return await asyncio.to_thread(
+            self.upload_image_bytes, processed_bytes, destination_path, content_type
+        )
+
+    def _decode_draw_encode(self, image_bytes: bytes, image_position: Optional[str]) -> bytes:
+        """Draw the BBOX from image_position onto the image, returning the original bytes if there is none."""
+        # Process image with BBOX if position data is available
+        if image_position and ("BBOX" in image_position or "bbox" in image_position):
+            logger.debug(f"Processing image with BBOX: {image_position}")
+            bbox_coords = self.parse_bbox_coordinates(image_position)
+            
+            if bbox_coords:
+                processed_bytes = self.draw_rectangle_on_image(image_bytes, bbox_coords)
+                logger.debug("Successfully drew rectangle on image")
+                return processed_bytes
+            logger.warning("Could not parse BBOX coordinates, uploading original image")
+        else:
+            logger.debug("No BBOX coordinates found, uploading original image")
+        return image_bytes
+
     def upload_image_bytes(
         self,
         data: bytes,
@@ -194,23 +409,28 @@ class SimpleFirebaseClient:
         try:
             if not self.is_initialized:
                 raise Exception("Firebase client not initialized")
-            if not config.firebase.storage_bucket:
+            bucket = self.bucket
+            if bucket is None:
                 raise Exception("Firebase storage bucket not configured")
 
-            bucket = storage.bucket(config.firebase.storage_bucket)
-            import uuid as _uuid
             blob = bucket.blob(destination_path)
             # Create a download token (used by console and REST API)
-            download_token = _uuid.uuid4().hex
+            download_token = uuid.uuid4().hex
             blob.metadata = {"firebaseStorageDownloadTokens": download_token}
-            blob.upload_from_string(data, content_type=content_type)
-
+            if len(data) > config.pipeline.parallel_upload_threshold:
+                # Very large payloads go up as parallel parts composed server-side
+                self._upload_composite(bucket, blob, data, content_type)
+            else:
+                # Typical frames go up in one multipart request; only large payloads
+                # pay for a resumable session, uploaded in fixed-size chunks
+                if len(data) > SINGLE_SHOT_THRESHOLD:
+                    blob.chunk_size = RESUMABLE_CHUNK_SIZE
+                blob.upload_from_string(data, content_type=content_type, timeout=30)
 
-            logger.info(f"Uploaded image to storage: gs://{bucket.name}/{destination_path}")
+            logger.debug(f"Uploaded image to storage: gs://{bucket.name}/{destination_path}")
 
             # Build REST API URLs (work for public files; for private, require auth)
-            from urllib.parse import quote as _urlquote
-            encoded_path = _urlquote(destination_path, safe="")
+            encoded_path = quote(destination_path, safe="")
             base_url = f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}/o/{encoded_path}"
             media_url = f"{base_url}?alt=media"
             media_url_with_token = f"{base_url}?alt=media&token={download_token}"
@@ -225,46 +445,58 @@ class SimpleFirebaseClient:
             logger.error(f"Failed to upload image to storage: {e}")
             return {}
     
-    def _prepare_document_for_firestore(self, doc_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Prepare document for Firestore storage."""
-        # Add metadata
-        doc_data["created_at"] = datetime.utcnow()
-        doc_data["updated_at"] = datetime.utcnow()
-        doc_data["status"] = "Pending"
-
-        # Convert any non-serializable objects to strings
-        for key, value in doc_data.items():
-            if isinstance(value, datetime):
-                continue  # Firestore handles datetime objects
-            elif not self._is_firestore_compatible(value):
-                doc_data[key] = json.dumps(value, default=str)
+    def _upload_composite(self, bucket, blob, data: bytes, content_type: str):
+        """Upload data as PARALLEL_UPLOAD_PARTS parts in parallel, compose them into blob and delete the parts."""
+        part_size = -(-len(data) // PARALLEL_UPLOAD_PARTS)
+        parts = [
+            bucket.blob(f"{blob.name}.part{i}")
+            for i in range(PARALLEL_UPLOAD_PARTS)
+        ]
         
-        return doc_data
+        pool = self._get_part_upload_pool()
+        try:
+            futures = [
+                pool.submit(
+                    part.upload_from_string,
+                    data[i * part_size:(i + 1) * part_size],
+                    content_type=content_type,
+                    timeout=60
+                )
+                for i, part in enumerate(parts)
+            ]
+            for future in futures:
+                future.result()
+            
+            # Content type and metadata on the destination are applied by compose
+            blob.content_type = content_type
+            blob.compose(parts, timeout=60)
+        finally:
+            for part in parts:
+                try:
+                    part.delete()
+                except Exception:
+                    pass
     
-    def _is_firestore_compatible(self, value: Any) -> bool:
-        """Check if a value is compatible with Firestore."""
-        compatible_types = (
-            str, int, float, bool, datetime, 
-            type(None), list, dict
-        )
-        
-        if isinstance(value, compatible_types):
-            if isinstance(value, (list, dict)):
-                # Check nested values
-                if isinstance(value, list):
-                    return all(self._is_firestore_compatible(item) for item in value)
-                else:  # dict
-                    return all(self._is_firestore_compatible(v) for v in value.values())
-            return True
-        
-        return False
+    def _get_part_upload_pool(self) -> ThreadPoolExecutor:
+        """Create the composite part upload pool on first use."""
+        # A dedicated pool: callers may already be running on the pipeline's upload pool
+        with self._part_upload_pool_lock:
+            if self._part_upload_pool is None:
+                self._part_upload_pool = ThreadPoolExecutor(
+                    max_workers=PARALLEL_UPLOAD_PARTS, thread_name_prefix="upload-part"
+                )
+            return self._part_upload_pool
+    
+    def _prepare_document_for_firestore(self, doc_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare document for Firestore storage."""
+        return prepare_document_for_firestore(doc_data, datetime.utcnow())
     
     def store_documents_batch(
         self,
         documents: List[Dict[str, Any]],
         collection_name: str
     ) -> int:
-        """Store multiple documents in Firestore using batch write."""
+        """Store multiple documents in Firestore using a BulkWriter."""
         try:
             if not self.is_initialized or not self.db:
                 raise Exception("Firebase client not initialized")
@@ -272,53 +504,53 @@ class SimpleFirebaseClient:
             if not documents:
                 return 0
             
-            # Use smaller batch size to avoid timeouts
-            batch_size = config.pipeline.batch_size
-            successful_stores = 0
             total_documents = len(documents)
+            successful_stores = 0
+            counter_lock = threading.Lock()
+            
+            def on_success(reference, result, job):
+                nonlocal successful_stores
+                with counter_lock:
+                    successful_stores += 1
             
-            logger.info(f"Storing {total_documents} documents in batches of {batch_size}")
+            def on_error(failure, job) -> bool:
+                # Retry (with exponential backoff) transient failures such as
+                # RESOURCE_EXHAUSTED, but give up after the configured attempts
+                logger.warning(f"⚠️ Write to {failure.operation.reference.id} failed (attempt {failure.attempts}): {failure.message}")
+                return failure.attempts < config.pipeline.max_retries
             
-            for i in range(0, total_documents, batch_size):
-                batch_documents = documents[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (total_documents + batch_size - 1) // batch_size
+            logger.info(f"Storing {total_documents} documents via BulkWriter")
+            
+            # BulkWriter pipelines writes in parallel and rate-limits itself: it
+            # starts at write_qps and ramps up while Firestore keeps accepting,
+            # so no manual chunking or sleeping between batches is needed
+            bulk_writer = self.db.bulk_writer(
+                options=BulkWriterOptions(
+                    initial_ops_per_second=config.pipeline.write_qps,
+                    retry=BulkRetry.exponential,
+                )
+            )
+            bulk_writer.on_write_result(on_success)
+            bulk_writer.on_write_error(on_error)
+            
+            # One timestamp for the whole batch
+            now = datetime.utcnow()
+            collection_ref = self._get_collection(collection_name)
+            for doc in documents:
+                source_index = doc.get('_index', 'unknown')
+                source_id = doc.get('_id', 'unknown')
                 
-                logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch_documents)} documents)")
+                # Prepared in place, so callers see the stamped source
+                firestore_data = prepare_document_for_firestore(doc.setdefault('_source', {}), now)
                 
-                try:
-                    # Create batch
-                    batch = self.db.batch()
-                    
-                    for doc in batch_documents:
-                        # Create unique document ID
-                        doc_id = f"{doc.get('_index', 'unknown')}_{doc.get('_id', 'unknown')}"
-                        
-                        # Prepare document data
-                        firestore_data = self._prepare_document_for_firestore(doc.get('_source', {}))
-                        
-                        # Add source metadata
-                        firestore_data["source_index"] = doc.get('_index', 'unknown')
-                        firestore_data["source_id"] = doc.get('_id', 'unknown')
-                        
-                        # Set document in batch
-                        doc_ref = self.db.collection(collection_name).document(doc_id)
-                        batch.set(doc_ref, firestore_data)
-                    
-                    # Commit the batch
-                    batch.commit()
-                    successful_stores += len(batch_documents)
-                    
-                    logger.info(f"✅ Successfully stored batch {batch_num}/{total_batches} ({len(batch_documents)} documents)")
-                    
-                except Exception as batch_error:
-                    logger.error(f"❌ Failed to store batch {batch_num}/{total_batches}: {batch_error}")
-                    # Continue with next batch instead of failing completely
-                    continue
+                # Add source metadata
+                firestore_data["source_index"] = source_index
+                firestore_data["source_id"] = source_id
                 
-                # Small delay between batches to avoid overwhelming Firebase
-                if i + batch_size < total_documents:
-                    time.sleep(0.2)  # 200ms delay between batches
+                bulk_writer.set(collection_ref.document(_document_id(source_index, source_id)), firestore_data)
+            
+            # Flush all pending writes and wait for them to complete
+            bulk_writer.close()
             
             logger.info(f"Successfully stored {successful_stores}/{total_documents} documents in {collection_name}")
             return successful_stores
@@ -327,21 +559,47 @@ class SimpleFirebaseClient:
             logger.error(f"Failed to store documents batch: {e}")
             return 0
     
+    def _get_collection(self, collection_name: str):
+        """Return the cached default collection reference, or a new one for other collections."""
+        if self._collection_ref is not None and collection_name == config.firebase.collection:
+            return self._collection_ref
+        return self.db.collection(collection_name)
+    
+    def close(self):
+        """Release the composite upload threads."""
+        with self._part_upload_pool_lock:
+            pool, self._part_upload_pool = self._part_upload_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+    
     def test_connection(self) -> bool:
         """Test the Firebase connection."""
         try:
             if not self.is_initialized or not self.db:
                 return False
             
-            # Try to access a collection (this will fail if not authenticated)
-            collections = self.db.collections()
-            return True
+            # Health probes poll frequently; reuse a recent result
+            now = time.monotonic()
+            checked_at, healthy = self._last_ping
+            if now - checked_at < CONNECTION_CHECK_TTL_SECONDS:
+                return healthy
+            
+            # One small point read with a bounded deadline; it fails if not
+            # authenticated or unreachable, and works whether or not the doc exists
+            try:
+                self.db.collection("_healthcheck").document("ping").get(timeout=2.0)
+                healthy = True
+            except Exception as e:
+                logger.error(f"Firebase connection test failed: {e}")
+                healthy = False
+            
+            self._last_ping = (now, healthy)
+            return healthy
             
         except Exception as e:
             logger.error(f"Firebase connection test failed: {e}")
             return False
 
 
-
 # Global Firebase client instance
 firebase_client = SimpleFirebaseClient()
@@ -18,7 +18,9 @@ def setup_logging():
         sys.stdout,
         level=config.logging.log_level,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        colorize=True
+        colorize=True,
+        enqueue=True,  # write from a background thread so worker threads never block on I/O
+        diagnose=False
     )
     
     # Add file logging
@@ -28,7 +30,9 @@ def setup_logging():
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         rotation="10 MB",
         retention="7 days",
-        compression="zip"
+        compression="zip",
+        enqueue=True,
+        diagnose=False
     )
 
 def signal_handler(signum, frame):
@@ -1,10 +1,15 @@
-import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from loguru import logger
-from firebase_admin import firestore
+from firebase_admin import firestore, messaging
 from firebase_client import firebase_client
 
+# Firestore limits: values per "in" filter and writes per batch
+TOKEN_IN_QUERY_LIMIT = 10
+FIRESTORE_BATCH_LIMIT = 500
+# FCM limit on tokens per multicast message
+FCM_MULTICAST_LIMIT = 500
+
 
 class NotificationService:
     """Service for sending Firebase Cloud Messaging notifications."""
@@ -36,20 +41,25 @@ class NotificationService:
             if limit and limit > 0:
                 query = query.limit(limit)
             
-            snapshots = query.stream()
+            # Only the token is read, so don't ship the rest of each responder document
+            snapshots = query.select(["notification_token"]).stream()
             tokens: List[str] = []
+            seen = set()
             
+            # Deduplicate while fetching, preserving first-seen order
             for snap in snapshots:
                 data = snap.to_dict() or {}
                 token = data.get("notification_token")
                 
-                if isinstance(token, str) and token.strip():
-                    tokens.append(token.strip())
+                if isinstance(token, str):
+                    token = token.strip()
+                    if token and token not in seen:
+                        seen.add(token)
+                        tokens.append(token)
             
-            unique_tokens = list(dict.fromkeys(tokens))
             status_filter = "online " if online_only else ""
-            logger.info(f"Fetched {len(unique_tokens)} {status_filter}responder tokens")
-            return unique_tokens
+            logger.info(f"Fetched {len(tokens)} {status_filter}responder tokens")
+            return tokens
             
         except Exception as e:
             logger.error(f"Failed to fetch responder tokens: {e}")
@@ -62,8 +72,6 @@ class NotificationService:
         body: str
     ) -> Dict[str, Any]:
         try:
-            from firebase_admin import messaging
-            
             if not self.firebase_client.is_initialized:
                 raise Exception("Firebase client not initialized")
             
@@ -77,36 +85,44 @@ class NotificationService:
             success_count = 0
             failure_count = 0
             responses = []
-            
-            for token in valid_tokens:
-                try:
-                    message = messaging.Message(
-                        notification=messaging.Notification(title=title, body=body),
-                        token=token
-                    )
-                    
-                    # Send notification
-                    message_id = messaging.send(message)
-                    success_count += 1
+            invalid_tokens: List[str] = []
+            
+            # One shared Notification payload per multicast; FCM accepts at most 500 tokens each
+            notification = messaging.Notification(title=title, body=body)
+            send_results = []
+            for i in range(0, len(valid_tokens), FCM_MULTICAST_LIMIT):
+                chunk = valid_tokens[i:i + FCM_MULTICAST_LIMIT]
+                batch_response = messaging.send_each_for_multicast(
+                    messaging.MulticastMessage(notification=notification, tokens=chunk)
+                )
+                success_count += batch_response.success_count
+                failure_count += batch_response.failure_count
+                send_results.extend(batch_response.responses)
+            
+            for token, send_response in zip(valid_tokens, send_results):
+                if send_response.success:
                     responses.append({
                         "token": token[:20] + "...",  
-                        "message_id": message_id
+                        "message_id": send_response.message_id
                     })
                     logger.debug(f"Sent notification to token {token[:20]}... successfully")
-                    
-                except Exception as token_error:
-                    failure_count += 1
-                    error_type = getattr(token_error, "__class__", type("Error", (), {})).__name__
-                    responses.append({
-                        "token": token[:20] + "...", 
-                        "error": error_type,
-                        "detail": str(token_error)
-                    })
-                    logger.warning(f"Failed to send to token {token[:20]}...: {token_error}")
-                    
-                    # If token is invalid, mark it for cleanup
-                    if "not found" in str(token_error).lower() or "invalid" in str(token_error).lower():
-                        self._mark_token_for_cleanup(token)
+                    continue
+                
+                token_error = send_response.exception
+                error_type = getattr(token_error, "__class__", type("Error", (), {})).__name__
+                responses.append({
+                    "token": token[:20] + "...", 
+                    "error": error_type,
+                    "detail": str(token_error)
+                })
+                logger.warning(f"Failed to send to token {token[:20]}...: {token_error}")
+                
+                # If token is invalid, mark it for cleanup
+                if "not found" in str(token_error).lower() or "invalid" in str(token_error).lower():
+                    invalid_tokens.append(token)
+            
+            if invalid_tokens:
+                self._mark_tokens_for_cleanup(invalid_tokens)
             
             result = {
                 "success_count": success_count,
@@ -128,8 +144,6 @@ class NotificationService:
         body: str
     ) -> Dict[str, Any]:
         try:
-            from firebase_admin import messaging
-            
             if not self.firebase_client.is_initialized:
                 raise Exception("Firebase client not initialized")
             
@@ -166,9 +180,10 @@ class NotificationService:
             total_failure = 0
             all_responses: List[Dict[str, Any]] = []
             
-            # Send in batches
-            for i in range(0, len(all_tokens), max(1, batch_size)):
-                chunk = all_tokens[i:i + max(1, batch_size)]
+            # Send in batches, never larger than a single multicast
+            batch_size = max(1, min(batch_size, FCM_MULTICAST_LIMIT))
+            for i in range(0, len(all_tokens), batch_size):
+                chunk = all_tokens[i:i + batch_size]
                 res = self.send_notification_to_tokens(chunk, title, body)
                 
                 total_success += int(res.get("success_count", 0))
@@ -176,10 +191,6 @@ class NotificationService:
                 
                 if isinstance(res.get("responses"), list):
                     all_responses.extend(res["responses"])
-                
-                # Small delay between batches to avoid overwhelming FCM
-                if i + batch_size < len(all_tokens):
-                    time.sleep(0.1)
             
             summary = {
                 "success_count": total_success,
@@ -196,27 +207,48 @@ class NotificationService:
             logger.error(f"Failed to send notifications to responders: {e}")
             return {"success_count": 0, "failure_count": 0, "error": str(e)}
 
-    def _mark_token_for_cleanup(self, invalid_token: str):
-        """Mark a responder with invalid token for cleanup by setting status to offline."""
+    def _mark_tokens_for_cleanup(self, invalid_tokens: List[str]):
+        """Mark responders with invalid tokens for cleanup by setting status to offline."""
         try:
             if not self.firebase_client.is_initialized:
                 return
             
-            # Find responder with this token and mark as offline
-            docs = self.firebase_client.db.collection("responders").where(
-                filter=firestore.FieldFilter("notification_token", "==", invalid_token)
-            ).stream()
+            db = self.firebase_client.db
+            responders = db.collection("responders")
+            marked_at = datetime.utcnow()
+            batch = db.batch()
+            pending_writes = 0
+            marked_count = 0
+            
+            # Look responders up 10 tokens at a time with an "in" filter and
+            # apply the updates in as few batched commits as possible
+            for i in range(0, len(invalid_tokens), TOKEN_IN_QUERY_LIMIT):
+                chunk = invalid_tokens[i:i + TOKEN_IN_QUERY_LIMIT]
+                docs = responders.where(
+                    filter=firestore.FieldFilter("notification_token", "in", chunk)
+                ).stream()
+                
+                for doc in docs:
+                    batch.update(doc.reference, {
+                        "status": "offline",
+                        "token_invalid": True,
+                        "last_token_error": marked_at
+                    })
+                    pending_writes += 1
+                    marked_count += 1
+                    
+                    if pending_writes >= FIRESTORE_BATCH_LIMIT:
+                        batch.commit()
+                        batch = db.batch()
+                        pending_writes = 0
             
-            for doc in docs:
-                doc.reference.update({
-                    "status": "offline",
-                    "token_invalid": True,
-                    "last_token_error": datetime.utcnow()
-                })
-                logger.info(f"Marked responder {doc.id} as offline due to invalid token")
+            if pending_writes:
+                batch.commit()
+            
+            logger.info(f"Marked {marked_count} responders as offline due to invalid tokens")
                 
         except Exception as e:
-            logger.error(f"Failed to mark token for cleanup: {e}")
+            logger.error(f"Failed to mark tokens for cleanup: {e}")
 
     def cleanup_invalid_tokens(self) -> int:
         """Manually clean up all responders with invalid tokens."""
@@ -1,11 +1,22 @@
 import asyncio
+import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import chain, islice
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import quote
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from loguru import logger
 
+# Optional: concurrent image fetches; falls back to sequential requests without it
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 from config import config
 from elasticsearch_client import elasticsearch_client
 from firebase_client import firebase_client
@@ -14,6 +25,9 @@ from event_statistics import event_statistics_service
 from sms_service import sms_service
 from whatsapp_service import whatsapp_service
 
+# Case-insensitive BBOX marker check without upper-casing the whole position string
+BBOX_MARKER = re.compile(r"BBOX", re.IGNORECASE)
+
 
 class SimpleDataPipeline:
     """Simplified pipeline that works with raw dictionaries."""
@@ -28,12 +42,42 @@ class SimpleDataPipeline:
             "last_error": None,
             "processing_time_seconds": 0.0
         }
+        # Shared across pipeline cycles; Storage uploads are independent network round-trips
+        self._upload_pool: Optional[ThreadPoolExecutor] = self._create_upload_pool()
+        # Keep-alive session and bearer token for the image API, reused across cycles
+        self._image_session: Optional[requests.Session] = None
+        self._image_token: Optional[str] = None
+        self._image_token_expires = 0.0
+        self._image_token_lock = threading.Lock()
+        self._image_token_async_lock = asyncio.Lock()
+        self._aio_session: Optional["aiohttp.ClientSession"] = None
+        
+    @staticmethod
+    def _create_upload_pool() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=max(1, config.pipeline.upload_concurrency),
+            thread_name_prefix="image-upload"
+        )
+    
+    def _get_image_session(self) -> requests.Session:
+        """Return the shared image API session, creating it on first use."""
+        if self._image_session is None:
+            session = requests.Session()
+            session.verify = False
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._image_session = session
+        return self._image_session
         
     async def initialize(self) -> bool:
         """Initialize the pipeline by connecting to all services."""
         try:
             logger.info("Initializing simplified data pipeline...")
             
+            if self._upload_pool is None:
+                self._upload_pool = self._create_upload_pool()
+            
             # Initialize Firebase
             if not firebase_client.initialize():
                 logger.error("Failed to initialize Firebase client")
@@ -73,6 +117,18 @@ class SimpleDataPipeline:
         try:
             logger.info("Cleaning up pipeline resources...")
             elasticsearch_client.disconnect()
+            firebase_client.close()
+            sms_service.close()
+            whatsapp_service.close()
+            if self._upload_pool is not None:
+                self._upload_pool.shutdown(wait=True)
+                self._upload_pool = None
+            if self._image_session is not None:
+                self._image_session.close()
+                self._image_session = None
+            if self._aio_session is not None:
+                await self._aio_session.close()
+                self._aio_session = None
             logger.info("Pipeline cleanup completed")
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
@@ -99,8 +155,7 @@ class SimpleDataPipeline:
             logger.info(f"Found {len(documents)} recent documents")
             # Image Processing and incremental commit (also stores docs)
             try:
-                token = self._fetch_image_bearer_token()
-                stored_count = self._process_and_attach_images_with_incremental_commit(documents, token)
+                stored_count = await self._process_and_attach_images_async(documents)
             except Exception as img_err:
                 logger.error(f"Image processing failed: {img_err}")
                 stored_count = 0
@@ -130,24 +185,28 @@ class SimpleDataPipeline:
         try:
             logger.info("Starting to process all data from Elasticsearch...")
             
-            # Get all documents from Elasticsearch
-            documents = elasticsearch_client.get_all_documents(
+            # Stream documents from Elasticsearch page by page; image work on
+            # one page starts while later pages are still unfetched
+            documents = elasticsearch_client.iter_all_documents(
                 index_name=config.elasticsearch.index,
-                batch_size=config.pipeline.batch_size
+                batch_size=config.pipeline.batch_size,
+                keep_alive="5m"
             )
             
             if limit is not None and limit > 0:
-                documents = documents[:limit]
+                documents = islice(documents, limit)
 
-            if not documents:
+            # Paging through Elasticsearch blocks, so pull from the iterator off the event loop
+            first = await asyncio.to_thread(next, documents, None)
+            if first is None:
                 logger.info("No documents found")
                 return 0
+            documents = chain([first], documents)
             
-            logger.info(f"Found {len(documents)} documents")
+            logger.info("Streaming documents from Elasticsearch")
             # Image Processing and incremental commit (also stores docs)
             try:
-                token = self._fetch_image_bearer_token()
-                stored_count = self._process_and_attach_images_with_incremental_commit(documents, token)
+                stored_count = await self._process_and_attach_images_async(documents)
             except Exception as img_err:
                 logger.error(f"Image processing failed: {img_err}")
                 stored_count = 0
@@ -172,14 +231,69 @@ class SimpleDataPipeline:
             self.stats["last_error"] = str(e)
             return 0
 
-    def _fetch_image_bearer_token(self) -> str:
-        """Authenticate and get bearer token for image API."""
-        url = config.pipeline.image_auth_url
-        payload = {"username": config.pipeline.image_username, "password": config.pipeline.image_password}
-        response = requests.post(url, json=payload, verify=False, timeout=15)
-        response.raise_for_status()
-        token = response.text.strip().strip('"')
-        return token
+    def _fetch_image_bearer_token(self, rejected_token: Optional[str] = None) -> str:
+        """
+        Get a bearer token for the image API, reusing the cached one until it
+        expires or the server rejects it (pass the rejected token to force a refresh).
+        """
+        with self._image_token_lock:
+            if (
+                self._image_token
+                and self._image_token != rejected_token
+                and time.monotonic() < self._image_token_expires
+            ):
+                return self._image_token
+            
+            url = config.pipeline.image_auth_url
+            payload = {"username": config.pipeline.image_username, "password": config.pipeline.image_password}
+            response = self._get_image_session().post(url, json=payload, timeout=15)
+            response.raise_for_status()
+            token = response.text.strip().strip('"')
+            
+            self._image_token = token
+            self._image_token_expires = time.monotonic() + config.pipeline.image_token_ttl_seconds
+            return token
+    
+    async def _fetch_image_bearer_token_async(self, rejected_token: Optional[str] = None) -> str:
+        """Async counterpart of _fetch_image_bearer_token over the shared aiohttp session."""
+        async with self._image_token_async_lock:
+            if (
+                self._image_token
+                and self._image_token != rejected_token
+                and time.monotonic() < self._image_token_expires
+            ):
+                return self._image_token
+            
+            url = config.pipeline.image_auth_url
+            payload = {"username": config.pipeline.image_username, "password": config.pipeline.image_password}
+            async with self._get_aio_session().post(
+                url, json=payload, timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                response.raise_for_status()
+                token = (await response.text()).strip().strip('"')
+            
+            self._image_token = token
+            self._image_token_expires = time.monotonic() + config.pipeline.image_token_ttl_seconds
+            return token
+    
+    def _get_aio_session(self) -> "aiohttp.ClientSession":
+        """Return the shared aiohttp session, creating it on first use (inside the running loop)."""
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=False, limit=64, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=20)
+            )
+        return self._aio_session
+    
+    def _get_image(self, url: str) -> requests.Response:
+        """GET an image with the cached bearer token, refreshing it once on 401."""
+        session = self._get_image_session()
+        token = self._fetch_image_bearer_token()
+        resp = session.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+        if resp.status_code == 401:
+            token = self._fetch_image_bearer_token(rejected_token=token)
+            resp = session.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+        return resp
 
     def _build_image_url(self, index_name: str, source_id: str) -> str:
         base_raw = config.pipeline.image_base_url or ""
@@ -194,12 +308,11 @@ class SimpleDataPipeline:
             return self._build_image_url(index_name, source_id)
         return self._build_image_url(f".ds-{index_name}", source_id)
 
-    def _process_and_attach_images(self, documents: List[Dict[str, Any]], token: str) -> None:
+    def _process_and_attach_images(self, documents: List[Dict[str, Any]]) -> None:
         """For each document, fetch its image and upload to Firebase Storage, then enrich doc."""
-        headers = {"Authorization": f"Bearer {token}"}
-        session = requests.Session()
-        session.verify = False
         logger.info(f"Starting image processing for {len(documents)} documents")
+        # One date partition per run rather than a strftime per document
+        ts = datetime.utcnow().strftime("%Y/%m/%d")
         for doc in documents:
             try:
                 index_name = doc.get("_index", "")
@@ -207,16 +320,15 @@ class SimpleDataPipeline:
                 if not index_name or not source_id:
                     continue
                 image_url = self._build_image_url(index_name, source_id)
-                resp = session.get(image_url, headers=headers, timeout=20)
+                resp = self._get_image(image_url)
                 if resp.status_code == 404:
                     alt_url = self._build_alt_image_url(index_name, source_id)
                     logger.warning(f"Primary image URL 404, retrying with alt form: {alt_url}")
-                    resp = session.get(alt_url, headers=headers, timeout=20)
+                    resp = self._get_image(alt_url)
                 if resp.status_code != 200 or not resp.content:
                     logger.warning(f"No image for {index_name}/{source_id} (status {resp.status_code})")
                     continue
                 content_type = resp.headers.get("Content-Type", "image/jpeg")
-                ts = datetime.utcnow().strftime("%Y/%m/%d")
                 dest_path = f"{config.pipeline.storage_prefix}/{ts}/{index_name}_{source_id}.jpg"
                 
                 # Get image_position from document source for BBOX processing
@@ -224,10 +336,10 @@ class SimpleDataPipeline:
                 image_position = src.get("image_position")
                 
                 # Log BBOX processing info
-                if image_position and "BBOX" in image_position.upper():
-                    logger.info(f"Processing image with BBOX for {index_name}/{source_id}: {image_position}")
+                if image_position and BBOX_MARKER.search(image_position):
+                    logger.debug(f"Processing image with BBOX for {index_name}/{source_id}: {image_position}")
                 else:
-                    logger.info(f"No BBOX data found for {index_name}/{source_id}, processing original image")
+                    logger.debug(f"No BBOX data found for {index_name}/{source_id}, processing original image")
                 
                 # Process image with BBOX rectangle if position data is available
                 upload_meta = firebase_client.process_image_with_bbox(
@@ -244,18 +356,20 @@ class SimpleDataPipeline:
                     )
                     if media_url:
                         src["image_url"] = media_url
-                        logger.info(f"Attached processed image URL to document {source_id}")
+                        logger.debug(f"Attached processed image URL to document {source_id}")
             except Exception as e:
                 logger.error(f"Image handling failed for doc {doc.get('_id')}: {e}")
         logger.info("Image processing step complete")
 
-    def _process_and_attach_images_with_incremental_commit(self, documents: List[Dict[str, Any]], token: str) -> int:
+    def _process_and_attach_images_with_incremental_commit(self, documents: Iterable[Dict[str, Any]]) -> int:
         batch_size = max(1, config.pipeline.batch_size)
-        headers = {"Authorization": f"Bearer {token}"}
-        session = requests.Session()
-        session.verify = False
+        # Authenticate up front; the token is cached between cycles
+        self._fetch_image_bearer_token()
         logger.info(f"Starting image processing with incremental commit, batch size {batch_size}")
-        staged: List[Dict[str, Any]] = []
+        # One date partition per run rather than a strftime per document
+        ts = datetime.utcnow().strftime("%Y/%m/%d")
+        # (doc, upload future or None when there is no image to upload)
+        pending: List[Tuple[Dict[str, Any], Optional[Future]]] = []
         total_committed = 0
         batch_number = 0
         
@@ -266,81 +380,244 @@ class SimpleDataPipeline:
                 if not index_name or not source_id:
                     continue
                 image_url = self._build_image_url(index_name, source_id)
-                logger.info(f"Fetching image for {index_name}/{source_id}")
-                resp = session.get(image_url, headers=headers, timeout=20)
+                logger.debug(f"Fetching image for {index_name}/{source_id}")
+                resp = self._get_image(image_url)
                 if resp.status_code == 404:
                     alt_url = self._build_alt_image_url(index_name, source_id)
                     logger.warning(f"Primary image URL 404, retrying: {alt_url}")
-                    resp = session.get(alt_url, headers=headers, timeout=20)
+                    resp = self._get_image(alt_url)
+                upload = None
                 if resp.status_code == 200 and resp.content:
                     content_type = resp.headers.get("Content-Type", "image/jpeg")
-                    ts = datetime.utcnow().strftime("%Y/%m/%d")
-                    dest_path = f"{config.pipeline.storage_prefix}/{ts}/{index_name}_{source_id}.jpg"
-                    
-                    # Get image_position from document source for BBOX processing
-                    src = doc.setdefault("_source", {})
-                    image_position = src.get("image_position")
-                    
-                    # Log BBOX processing info
-                    if image_position and "BBOX" in image_position.upper():
-                        logger.info(f"Processing image with BBOX for {index_name}/{source_id}: {image_position}")
-                    else:
-                        logger.info(f"No BBOX data found for {index_name}/{source_id}, processing original image")
-                    
-                    # Process image with BBOX rectangle if position data is available
-                    upload_meta = firebase_client.process_image_with_bbox(
-                        resp.content, 
-                        image_position, 
-                        dest_path, 
-                        content_type=content_type
+                    upload = self._upload_pool.submit(
+                        self._attach_processed_image, doc, resp.content, content_type, ts
                     )
-                    
-                    if upload_meta:
-                        media_url = (
-                            upload_meta.get("media_url_with_token")
-                            or upload_meta.get("media_url")
-                        )
-                        if media_url:
-                            src["image_url"] = media_url
-                            logger.info(f"Attached processed image URL to document {source_id}")
-                    else:
-                        logger.error(f"Upload failed for {index_name}/{source_id}")
                 else:
                     logger.warning(f"No image for {index_name}/{source_id} (status {resp.status_code})")
-                staged.append(doc)
-                if len(staged) >= batch_size:
-                    committed = firebase_client.store_documents_batch(staged, config.firebase.collection)
-                    logger.info(f"Committed {len(staged)} documents to Firestore")
+                pending.append((doc, upload))
+                if len(pending) >= batch_size:
+                    committed = self._commit_staged_documents(self._drain_uploads(pending), batch_number + 1)
                     total_committed += committed
-                    
-                    # Send notification and update statistics after successful batch commit
                     if committed > 0:
                         batch_number += 1
-                        self._send_batch_notification(committed, batch_number)
-                        self._send_sms_alerts_for_batch(staged, batch_number)
-                        self._send_whatsapp_alerts_for_batch(staged, batch_number)
-                        self._update_event_statistics()
-                    
-                    staged = []
+                    pending = []
             except Exception as e:
                 logger.error(f"Image handling failed for doc {doc.get('_id')}: {e}")
         
         # Handle remaining staged documents
-        if staged:
-            committed = firebase_client.store_documents_batch(staged, config.firebase.collection)
-            logger.info(f"Committed remaining {len(staged)} documents to Firestore")
-            total_committed += committed
-            
-            # Send notification and update statistics for final batch if any documents were committed
-            if committed > 0:
-                batch_number += 1
-                self._send_batch_notification(committed, batch_number)
-                self._send_sms_alerts_for_batch(staged, batch_number)
-                self._send_whatsapp_alerts_for_batch(staged, batch_number)
-                self._update_event_statistics()
+        if pending:
+            total_committed += self._commit_staged_documents(self._drain_uploads(pending), batch_number + 1)
         
         return total_committed
     
+    async def _process_and_attach_images_async(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Async variant of _process_and_attach_images_with_incremental_commit, run as a
+        three-stage pipeline (fetch -> upload -> commit) connected by bounded queues,
+        so a batch's Firestore commit overlaps with later fetches and uploads.
+        """
+        if aiohttp is None:
+            logger.warning("aiohttp not installed, fetching images sequentially")
+            return await asyncio.to_thread(self._process_and_attach_images_with_incremental_commit, documents)
+        
+        documents = iter(documents)
+        batch_size = max(1, config.pipeline.batch_size)
+        fetch_workers = max(1, config.pipeline.image_fetch_concurrency)
+        upload_workers = max(1, config.pipeline.upload_concurrency)
+        logger.info(f"Starting async image processing with incremental commit, batch size {batch_size}")
+        
+        # Authenticate up front; the token is cached between cycles
+        await self._fetch_image_bearer_token_async()
+        session = self._get_aio_session()
+        loop = asyncio.get_running_loop()
+        # One date partition per run rather than a strftime per document
+        ts = datetime.utcnow().strftime("%Y/%m/%d")
+        
+        # Bounded queues give back-pressure; None tells a worker to stop
+        fetch_q: asyncio.Queue = asyncio.Queue(maxsize=64)
+        upload_q: asyncio.Queue = asyncio.Queue(maxsize=64)
+        commit_q: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+        
+        async def fetcher():
+            while (doc := await fetch_q.get()) is not None:
+                try:
+                    await upload_q.put((doc, await self._fetch_image_async(session, doc)))
+                except Exception as e:
+                    logger.error(f"Image handling failed for doc {doc.get('_id')}: {e}")
+        
+        async def uploader():
+            while (item := await upload_q.get()) is not None:
+                doc, result = item
+                try:
+                    if result:
+                        content, content_type = result
+                        await loop.run_in_executor(
+                            self._upload_pool, self._attach_processed_image, doc, content, content_type, ts
+                        )
+                    await commit_q.put(doc)
+                except Exception as e:
+                    logger.error(f"Image handling failed for doc {doc.get('_id')}: {e}")
+        
+        async def committer() -> int:
+            total_committed = 0
+            batch_number = 0
+            staged: List[Dict[str, Any]] = []
+            while True:
+                doc = await commit_q.get()
+                if doc is not None:
+                    staged.append(doc)
+                if staged and (doc is None or len(staged) >= batch_size):
+                    committed = await asyncio.to_thread(
+                        self._commit_staged_documents, staged, batch_number + 1
+                    )
+                    total_committed += committed
+                    if committed > 0:
+                        batch_number += 1
+                    staged = []
+                if doc is None:
+                    return total_committed
+        
+        fetchers = [asyncio.create_task(fetcher()) for _ in range(fetch_workers)]
+        uploaders = [asyncio.create_task(uploader()) for _ in range(upload_workers)]
+        committer_task = asyncio.create_task(committer())
+        workers = [*fetchers, *uploaders, committer_task]
+        
+        try:
+            # Each next() may issue a blocking Elasticsearch page fetch; run it in a
+            # thread so fetchers and uploaders keep going while the page loads
+            while (doc := await asyncio.to_thread(next, documents, None)) is not None:
+                if doc.get("_index") and doc.get("_id"):
+                    await fetch_q.put(doc)
+            
+            # Shut the stages down in order so every document drains through
+            for _ in fetchers:
+                await fetch_q.put(None)
+            await asyncio.gather(*fetchers)
+            for _ in uploaders:
+                await upload_q.put(None)
+            await asyncio.gather(*uploaders)
+            await commit_q.put(None)
+            return await committer_task
+        finally:
+            for task in workers:
+                if not task.done():
+                    task.cancel()
+    
+    def _drain_uploads(self, pending: List[Tuple[Dict[str, Any], Optional[Future]]]) -> List[Dict[str, Any]]:
+        """Wait for queued uploads and return the documents that are ready to commit."""
+        staged: List[Dict[str, Any]] = []
+        for doc, upload in pending:
+            try:
+                if upload is not None:
+                    upload.result(timeout=30)
+                staged.append(doc)
+            except Exception as e:
+                logger.error(f"Image handling failed for doc {doc.get('_id')}: {e}")
+        return staged
+    
+    async def _fetch_image_async(
+        self,
+        session: "aiohttp.ClientSession",
+        doc: Dict[str, Any]
+    ) -> Optional[Tuple[bytes, str]]:
+        """Fetch one document's image, retrying the alt URL on 404. Returns (content, content_type) or None."""
+        index_name = doc["_index"]
+        source_id = doc["_id"]
+        logger.debug(f"Fetching image for {index_name}/{source_id}")
+        status, content, content_type = await self._get_image_async(
+            session, self._build_image_url(index_name, source_id)
+        )
+        if status == 404:
+            alt_url = self._build_alt_image_url(index_name, source_id)
+            logger.warning(f"Primary image URL 404, retrying: {alt_url}")
+            status, content, content_type = await self._get_image_async(session, alt_url)
+        
+        if status != 200 or not content:
+            logger.warning(f"No image for {index_name}/{source_id} (status {status})")
+            return None
+        return content, content_type
+    
+    async def _get_image_async(self, session: "aiohttp.ClientSession", url: str) -> Tuple[int, bytes, str]:
+        """GET an image with the cached bearer token, refreshing it once on 401."""
+        token = self._image_token or await self._fetch_image_bearer_token_async()
+        for attempt in range(2):
+            async with session.get(url, headers={"Authorization": f"Bearer {token}"}) as resp:
+                if resp.status == 401 and attempt == 0:
+                    token = await self._fetch_image_bearer_token_async(token)
+                    continue
+                content = await resp.read() if resp.status == 200 else b""
+                return resp.status, content, resp.headers.get("Content-Type", "image/jpeg")
+    
+    def _attach_processed_image(
+        self,
+        doc: Dict[str, Any],
+        content: bytes,
+        content_type: str,
+        date_path: str
+    ) -> None:
+        """Draw the BBOX (if any), upload the image and attach its URL to the document source."""
+        index_name = doc.get("_index", "")
+        source_id = doc.get("_id", "")
+        dest_path = f"{config.pipeline.storage_prefix}/{date_path}/{index_name}_{source_id}.jpg"
+        
+        # Get image_position from document source for BBOX processing
+        src = doc.setdefault("_source", {})
+        image_position = src.get("image_position")
+        
+        # Log BBOX processing info
+        if image_position and BBOX_MARKER.search(image_position):
+            logger.debug(f"Processing image with BBOX for {index_name}/{source_id}: {image_position}")
+        else:
+            logger.debug(f"No BBOX data found for {index_name}/{source_id}, processing original image")
+        
+        # Process image with BBOX rectangle if position data is available
+        upload_meta = firebase_client.process_image_with_bbox(
+            content, 
+            image_position, 
+            dest_path, 
+            content_type=content_type
+        )
+        
+        if upload_meta:
+            media_url = (
+                upload_meta.get("media_url_with_token")
+                or upload_meta.get("media_url")
+            )
+            if media_url:
+                src["image_url"] = media_url
+                logger.debug(f"Attached processed image URL to document {source_id}")
+        else:
+            logger.error(f"Upload failed for {index_name}/{source_id}")
+    
+    def _commit_staged_documents(self, staged: List[Dict[str, Any]], batch_number: int) -> int:
+        """Store a batch of documents and, if anything was stored, send alerts and refresh statistics."""
+        if not staged:
+            return 0
+        committed = firebase_client.store_documents_batch(staged, config.firebase.collection)
+        
+        # One summary line per batch instead of per-document info logs
+        images = bbox = 0
+        for doc in staged:
+            src = doc.get("_source") or {}
+            if src.get("image_url"):
+                images += 1
+                position = src.get("image_position")
+                if isinstance(position, str) and BBOX_MARKER.search(position):
+                    bbox += 1
+        logger.info(
+            f"Batch {batch_number}: documents={len(staged)} images={images} "
+            f"bbox={bbox} committed={committed}"
+        )
+        
+        # Send notification and update statistics after successful batch commit
+        if committed > 0:
+            self._send_batch_notification(committed, batch_number)
+            self._send_sms_alerts_for_batch(staged, batch_number)
+            self._send_whatsapp_alerts_for_batch(staged, batch_number)
+            self._update_event_statistics()
+        
+        return committed
+    
     def _send_batch_notification(self, batch_size: int, batch_number: int = None) -> bool:
         try:
             title = "Security Alert"
@@ -365,32 +642,21 @@ class SimpleDataPipeline:
             return False
     
     def _send_sms_alerts_for_batch(self, documents: List[Dict[str, Any]], batch_number: int = None) -> bool:
-        """Send SMS alerts for each event in the batch."""
+        """Queue SMS alerts for each event in the batch."""
         try:
             if not config.twilio.enabled:
                 logger.debug("SMS alerts disabled, skipping SMS notifications")
                 return True
             
-            success_count = 0
-            for doc in documents:
-                try:
-                    result = sms_service.send_event_alert(doc)
-                    if result.get("success"):
-                        success_count += 1
-                    else:
-                        error_msg = f"Failed to send SMS for event {doc.get('_id')}: {result.get('error')}"
-                        message_sid = result.get("message_sid")
-                        if message_sid:
-                            error_msg += f" (Message SID: {message_sid})"
-                        logger.warning(error_msg)
-                except Exception as e:
-                    logger.error(f"Error sending SMS for event {doc.get('_id')}: {e}")
+            # Queued without waiting: paced delivery would hold up the commit path,
+            # and the SMS service logs each alert's result as it is sent
+            queued_count = sms_service.queue_event_alerts(documents)
             
-            if success_count > 0:
-                logger.info(f"Sent {success_count} SMS alerts for batch {batch_number or 'unknown'}")
+            if queued_count > 0:
+                logger.info(f"Queued {queued_count} SMS alerts for batch {batch_number or 'unknown'}")
                 return True
             else:
-                logger.warning(f"No SMS alerts sent for batch {batch_number or 'unknown'}")
+                logger.warning(f"No SMS alerts queued for batch {batch_number or 'unknown'}")
                 return False
                 
         except Exception as e:
@@ -405,19 +671,16 @@ class SimpleDataPipeline:
                 return True
             
             success_count = 0
-            for doc in documents:
-                try:
-                    result = whatsapp_service.send_event_alert(doc)
-                    if result.get("success"):
-                        success_count += 1
-                    else:
-                        error_msg = f"Failed to send WhatsApp for event {doc.get('_id')}: {result.get('error')}"
-                        message_sid = result.get("message_sid")
-                        if message_sid:
-                            error_msg += f" (Message SID: {message_sid})"
-                        logger.warning(error_msg)
-                except Exception as e:
-                    logger.error(f"Error sending WhatsApp for event {doc.get('_id')}: {e}")
+            # Sent concurrently, paced to the sender's messages-per-second cap
+            for doc, result in zip(documents, whatsapp_service.send_event_alerts(documents)):
+                if result.get("success"):
+                    success_count += 1
+                else:
+                    error_msg = f"Failed to send WhatsApp for event {doc.get('_id')}: {result.get('error')}"
+                    message_sid = result.get("message_sid")
+                    if message_sid:
+                        error_msg += f" (Message SID: {message_sid})"
+                    logger.warning(error_msg)
             
             if success_count > 0:
                 logger.info(f"Sent {success_count} WhatsApp alerts for batch {batch_number or 'unknown'}")
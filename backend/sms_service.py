@@ -1,29 +1,205 @@
-from typing import Dict, Any, Optional
+import array
+import asyncio
+import concurrent.futures
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set, Tuple
 from loguru import logger
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 from config import config
 
+if TYPE_CHECKING:
+    from twilio.rest import Client
+
+# Optional: concurrent sends over one keep-alive session; falls back to the
+# blocking Twilio client without it
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+ALERT_HEADER = "🚨 SECURITY ALERT 🚨"
+BATCH_ALERT_HEADER = "🚨 SECURITY BATCH ALERT 🚨"
+# Shared read-only results for sends rejected before any work is done
+NOT_INITIALIZED_RESULT = MappingProxyType({"success": False, "error": "SMS service not initialized"})
+NO_RECIPIENT_RESULT = MappingProxyType({"success": False, "error": "No recipient phone number configured"})
+DEDUPED_RESULT = MappingProxyType({"success": True, "deduped": True})
+DEDUP_CAPACITY = 4096
+BLOCKING_SEND_WORKERS = 16
+RATE_LIMIT_MAX_ATTEMPTS = 3
+RATE_LIMIT_BASE_DELAY = 1.0
+RATE_LIMIT_MAX_DELAY = 8.0
+# Seconds a caller waits on a queued alert beyond the time to drain the queue ahead of it
+EVENT_ALERT_TIMEOUT = 60.0
+
+# Fields tried in order for the event name, then keywords used to infer one
+EVENT_NAME_FIELDS = (
+    "event_name",
+    "event_type",
+    "alert_type",
+    "detection_type",
+    "incident_type",
+    "alarm_type",
+    "category",
+    "type",
+    "name",
+    "title",
+)
+EVENT_KEYWORDS = (
+    ("crowd", "Crowd Management Alert"),
+    ("intrusion", "Intrusion Detection Alert"),
+    ("fire", "Fire Detection Alert"),
+    ("motion", "Motion Detection Alert"),
+)
+CAMERA_FIELDS = ("camera_name", "camera_id", "source")
+EVENT_KEYWORD_PATTERN = re.compile("|".join(keyword for keyword, _ in EVENT_KEYWORDS))
+
+E164_PATTERN = re.compile(r"\+[1-9]\d{7,14}")
+_PHONE_SEPARATORS = str.maketrans("", "", " -().")
+
+
+@lru_cache(maxsize=1024)
+def _normalize_phone(number: str) -> Optional[str]:
+    """Strip separators and add the leading +; None unless the result is E.164."""
+    normalized = number.translate(_PHONE_SEPARATORS)
+    if not normalized.startswith("+"):
+        normalized = "+" + normalized
+    return normalized if E164_PATTERN.fullmatch(normalized) else None
+
+
+@lru_cache(maxsize=256)
+def _present_fields(keys: frozenset) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Name and camera fields present in an event shape; event streams repeat a few shapes."""
+    return (
+        tuple(field for field in EVENT_NAME_FIELDS if field in keys),
+        tuple(field for field in CAMERA_FIELDS if field in keys),
+    )
+
+
+def _iso_now() -> str:
+    """Current UTC time in the same ISO form as the events' @timestamp."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+COORDINATES_TEMPLATE = "📍 Coordinates: %.6f, %.6f\n🗺️ Map: https://maps.google.com/maps?q=%s,%s"
+
+
+@lru_cache(maxsize=8192)
+def _format_coordinates(lat: float, lon: float) -> str:
+    """Coordinates line plus Google Maps URL; cameras repeat the same positions."""
+    return COORDINATES_TEMPLATE % (lat, lon, lat, lon)
+
+
+def _format_plain_location(location: Any) -> str:
+    return f"📍 Location: {location}"
+
+
+def _format_dict_location(location: Dict[str, Any]) -> str:
+    lat = location.get("lat")
+    lon = location.get("lon")
+    if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+        return _format_coordinates(lat, lon)
+    return _format_plain_location(location)
+
+
+# Location formatter by exact type; anything else is shown as-is
+_LOCATION_FORMATTERS = {dict: _format_dict_location}
+
+
+class TokenBucket:
+    """Async token bucket that paces sends to Twilio's messages-per-second limit."""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 0.001)
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available, then take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 
 class SMSService:
     """Service for sending SMS notifications via Twilio."""
     
     def __init__(self):
-        self.client: Optional[Client] = None
+        self.client: Optional["Client"] = None
         self._initialized = False
+        # Twilio settings, read from config once in initialize()
+        self._sid: Optional[str] = None
+        self._token: Optional[str] = None
+        self._from: Optional[str] = None
+        self._default_to: Optional[str] = None
+        self._default_to_norm: Optional[str] = None
+        self._url: Optional[str] = None
+        self._messaging_service_sid: Optional[str] = None
+        self._max_batch = 1
+        self._flush_interval = 0.0
+        self._dedup_window = 0.0
+        # Recently sent message digests and when they were sent, oldest first
+        self._recent: "OrderedDict[bytes, float]" = OrderedDict()
+        self._recent_lock = threading.Lock()
+        # Background event loop that drives async sends for synchronous callers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        # Threads that overlap blocking Twilio client sends when aiohttp is unavailable
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._bucket: Optional[TokenBucket] = None
+        # Event alerts waiting for the next flush, each with the future for its result
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # The loop only holds tasks weakly, so flushes are kept here until they finish
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # Queued alerts not yet resolved; only changed on the service loop thread
+        self._backlog = 0
     
     def initialize(self) -> bool:
-        """Initialize the Twilio client."""
+        """Initialize the Twilio client (runs at import; repeat calls are no-ops)."""
+        if self._initialized:
+            return True
         try:
-            if not config.twilio.enabled:
+            twilio = config.twilio
+            if not twilio.enabled:
                 logger.info("Twilio SMS service is disabled")
                 return False
                 
-            if not config.twilio.account_sid or not config.twilio.auth_token:
+            if not twilio.account_sid or not twilio.auth_token:
                 logger.error("Twilio credentials not configured")
                 return False
             
-            self.client = Client(config.twilio.account_sid, config.twilio.auth_token)
+            # The Twilio SDK is slow to import and only the blocking fallback uses it
+            if aiohttp is None:
+                from twilio.rest import Client
+                self.client = Client(twilio.account_sid, twilio.auth_token)
+            self._sid = twilio.account_sid
+            self._token = twilio.auth_token
+            self._url = TWILIO_MESSAGES_URL.format(sid=twilio.account_sid)
+            self._from = twilio.from_phone
+            self._messaging_service_sid = twilio.messaging_service_sid
+            self._default_to = twilio.to_phone
+            self._default_to_norm = _normalize_phone(self._default_to) if self._default_to else None
+            self._max_batch = max(1, twilio.max_batch)
+            self._flush_interval = twilio.flush_interval_ms / 1000
+            self._dedup_window = float(twilio.dedup_window_seconds)
             self._initialized = True
             logger.info("Twilio SMS service initialized successfully")
             return True
@@ -32,33 +208,232 @@ class SMSService:
             logger.error(f"Failed to initialize Twilio SMS service: {e}")
             return False
     
+    def reload(self) -> bool:
+        """Re-read the Twilio settings; closes the current session and fails queued alerts."""
+        self.close()
+        self._initialized = False
+        return self.initialize()
+    
     def send_sms(self, message: str, to_phone: Optional[str] = None) -> Dict[str, Any]:
-        """Send an SMS message."""
+        """Send an SMS message (blocking; runs send_sms_async on the service's event loop)."""
+        if not self._initialized:
+            return NOT_INITIALIZED_RESULT
+        if aiohttp is None:
+            return self._send_sms_blocking(message, to_phone)
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self.send_sms_async(message, to_phone), self._ensure_loop()
+            )
+            return future.result(timeout=60)
+        except Exception as e:
+            logger.error(f"Unexpected error sending SMS: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def send_sms_async(self, message: str, to_phone: Optional[str] = None) -> Dict[str, Any]:
+        """Send an SMS message through the Twilio REST API over a shared aiohttp session."""
+        if aiohttp is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), self._send_sms_blocking, message, to_phone
+            )
+        dedup_key = None
         try:
             if not self._initialized:
-                if not self.initialize():
-                    return {"success": False, "error": "SMS service not initialized"}
+                return NOT_INITIALIZED_RESULT
+            
+            if not (to_phone or self._default_to):
+                return NO_RECIPIENT_RESULT
+            
+            # Reject malformed numbers here rather than after a round-trip to Twilio
+            recipient = self._normalize_recipient(to_phone)
+            if not recipient:
+                return {"success": False, "error": f"Invalid recipient phone number: {to_phone or self._default_to}"}
+            
+            is_duplicate, dedup_key = self._reserve_message(message, recipient)
+            if is_duplicate:
+                logger.debug("Skipping duplicate SMS to {}", recipient)
+                return DEDUPED_RESULT
+            
+            session = await self._ensure_session()
+            form = {"Body": message, "To": recipient}
+            if self._messaging_service_sid:
+                # Twilio picks the sender from the service's number pool
+                form["MessagingServiceSid"] = self._messaging_service_sid
+            else:
+                form["From"] = self._from
+            
+            for attempt in range(RATE_LIMIT_MAX_ATTEMPTS):
+                # Pace locally so bursts wait here instead of in Twilio's queue
+                await self._bucket.acquire()
+                async with self._sem:
+                    async with session.post(self._url, data=form) as resp:
+                        payload = await resp.json(content_type=None)
+                        status = resp.status
+                if status != 429 or attempt == RATE_LIMIT_MAX_ATTEMPTS - 1:
+                    break
+                delay = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** attempt)
+                logger.warning(f"Twilio rate limited the SMS send, retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+            
+            if status in (200, 201):
+                logger.info("SMS sent successfully. SID: {}", payload.get("sid"))
+                return {
+                    "success": True,
+                    "message_sid": payload.get("sid"),
+                    "to": recipient,
+                    "status": payload.get("status")
+                }
+            
+            error_code = payload.get("code")
+            error_message = payload.get("message") or f"HTTP {status}"
+            message_sid = payload.get("sid")
+            logger.bind(sid=message_sid, code=error_code).error(
+                "Twilio error sending SMS: {} (Code: {}, Message SID: {})", error_message, error_code, message_sid
+            )
+            self._release_message(dedup_key)
+            
+            return {
+                "success": False,
+                "error": f"Twilio error: {error_message}",
+                "error_code": error_code,
+                "message_sid": message_sid
+            }
+            
+        except Exception as e:
+            logger.error(f"Unexpected error sending SMS: {e}")
+            self._release_message(dedup_key)
+            return {"success": False, "error": str(e)}
+    
+    async def send_many(self, recipients: List[str], message: str) -> List[Dict[str, Any]]:
+        """Send the same message to many recipients concurrently (paced by the token bucket)."""
+        return await asyncio.gather(*(self.send_sms_async(message, recipient) for recipient in recipients))
+    
+    def _reserve_message(self, message: str, recipient: str) -> Tuple[bool, Optional[bytes]]:
+        """
+        Check this message against those sent to the recipient within the dedup
+        window. Returns (is_duplicate, key); a non-duplicate is reserved under key
+        until it is sent, and must be released with _release_message if the send fails.
+        """
+        if self._dedup_window <= 0:
+            return False, None
+        key = hashlib.blake2b(f"{recipient}\n{message}".encode(), digest_size=16).digest()
+        now = time.monotonic()
+        with self._recent_lock:
+            sent_at = self._recent.get(key)
+            if sent_at is not None and now - sent_at < self._dedup_window:
+                return True, None
+            self._recent[key] = now
+            self._recent.move_to_end(key)
+            while len(self._recent) > DEDUP_CAPACITY:
+                self._recent.popitem(last=False)
+        return False, key
+    
+    def _release_message(self, key: Optional[bytes]):
+        """Forget a reserved message whose send failed, so a retry is not deduplicated."""
+        if key is not None:
+            with self._recent_lock:
+                self._recent.pop(key, None)
+    
+    def _normalize_recipient(self, to_phone: Optional[str]) -> Optional[str]:
+        """Normalized E.164 form of the given or configured recipient, or None if invalid."""
+        if not to_phone:
+            return self._default_to_norm
+        return _normalize_phone(to_phone)
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="sms-sender", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+    
+    def _get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Create the blocking-send thread pool on first use."""
+        with self._loop_lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=BLOCKING_SEND_WORKERS, thread_name_prefix="twilio-sms"
+                )
+            return self._pool
+    
+    async def _ensure_session(self) -> "aiohttp.ClientSession":
+        """Create the shared Twilio session on first use (on the running loop)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=64, ttl_dns_cache=300),
+                auth=aiohttp.BasicAuth(self._sid, self._token),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+            self._sem = asyncio.Semaphore(max(1, config.twilio.max_concurrency))
+            self._bucket = TokenBucket(config.twilio.mps, config.twilio.mps_burst)
+        return self._session
+    
+    def close(self):
+        """Close the shared session and stop the background event loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._drop_queued_alerts(), loop).result(timeout=5)
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+                self._session = None
+        except Exception as e:
+            logger.warning(f"Error closing SMS session: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            if self._loop_thread is not None:
+                self._loop_thread.join(timeout=5)
+                self._loop_thread = None
+            loop.close()
+    
+    def _send_sms_blocking(self, message: str, to_phone: Optional[str] = None) -> Dict[str, Any]:
+        """Send an SMS message with the blocking Twilio client."""
+        from twilio.base.exceptions import TwilioRestException
+        
+        dedup_key = None
+        try:
+            if not self._initialized:
+                return NOT_INITIALIZED_RESULT
             
             if not self.client:
                 return {"success": False, "error": "Twilio client not available"}
             
-            # Use provided phone number or default from config
-            recipient = to_phone or config.twilio.to_phone
+            if not (to_phone or self._default_to):
+                return NO_RECIPIENT_RESULT
+            
+            # Reject malformed numbers here rather than after a round-trip to Twilio
+            recipient = self._normalize_recipient(to_phone)
             if not recipient:
-                return {"success": False, "error": "No recipient phone number configured"}
+                return {"success": False, "error": f"Invalid recipient phone number: {to_phone or self._default_to}"}
             
-            # Ensure phone number starts with +
-            if not recipient.startswith('+'):
-                recipient = '+' + recipient
+            is_duplicate, dedup_key = self._reserve_message(message, recipient)
+            if is_duplicate:
+                logger.debug("Skipping duplicate SMS to {}", recipient)
+                return DEDUPED_RESULT
             
             # Send SMS
-            message_obj = self.client.messages.create(
-                body=message,
-                from_=config.twilio.from_phone,
-                to=recipient
-            )
+            if self._messaging_service_sid:
+                message_obj = self.client.messages.create(
+                    body=message,
+                    messaging_service_sid=self._messaging_service_sid,
+                    to=recipient
+                )
+            else:
+                message_obj = self.client.messages.create(
+                    body=message,
+                    from_=self._from,
+                    to=recipient
+                )
             
-            logger.info(f"SMS sent successfully. SID: {message_obj.sid}")
+            logger.info("SMS sent successfully. SID: {}", message_obj.sid)
             return {
                 "success": True,
                 "message_sid": message_obj.sid,
@@ -69,10 +444,10 @@ class SMSService:
         except TwilioRestException as e:
             # Try to get message SID if the message was created but failed
             message_sid = getattr(e, 'sid', None) or getattr(e, 'message_sid', None)
-            if message_sid:
-                logger.error(f"Twilio error sending SMS: {e.msg} (Code: {e.code}, Message SID: {message_sid})")
-            else:
-                logger.error(f"Twilio error sending SMS: {e.msg} (Code: {e.code})")
+            logger.bind(sid=message_sid, code=e.code).error(
+                "Twilio error sending SMS: {} (Code: {}, Message SID: {})", e.msg, e.code, message_sid
+            )
+            self._release_message(dedup_key)
             
             return {
                 "success": False,
@@ -82,134 +457,292 @@ class SMSService:
             }
         except Exception as e:
             logger.error(f"Unexpected error sending SMS: {e}")
+            self._release_message(dedup_key)
             return {"success": False, "error": str(e)}
     
     def _format_location_with_maps(self, location: Any) -> str:
         """Format location data and include Google Maps URL if coordinates are available."""
-        try:
-            if isinstance(location, dict):
-                lat = location.get("lat")
-                lon = location.get("lon")
-                
-                if lat is not None and lon is not None:
-                    # Create Google Maps URL
-                    maps_url = f"https://maps.google.com/maps?q={lat},{lon}"
-                    return f"📍 Coordinates: {lat:.6f}, {lon:.6f}\n🗺️ Map: {maps_url}"
-                else:
-                    return f"📍 Location: {location}"
-            elif isinstance(location, str):
-                return f"📍 Location: {location}"
-            else:
-                return f"📍 Location: {location}"
-        except Exception as e:
-            logger.warning(f"Error formatting location: {e}")
-            return f"📍 Location: {location}"
+        return _LOCATION_FORMATTERS.get(type(location), _format_plain_location)(location)
     
-    def _extract_event_name(self, event_source: Dict[str, Any]) -> str:
+    def _extract_event_name(self, event_source: Dict[str, Any], name_fields: Tuple[str, ...] = EVENT_NAME_FIELDS) -> str:
         """Extract the most specific event name/type from the event data."""
-        # Try multiple possible field names for event type/name
-        possible_fields = [
-            "event_name",
-            "event_type", 
-            "alert_type",
-            "detection_type",
-            "incident_type",
-            "alarm_type",
-            "category",
-            "type",
-            "name",
-            "title"
-        ]
-        
-        for field in possible_fields:
+        for field in name_fields:
             value = event_source.get(field)
             if value and isinstance(value, str) and value.strip():
                 return value.strip()
         
-        # If no specific event type found, try to infer from other fields
-        if "crowd" in str(event_source).lower():
-            return "Crowd Management Alert"
-        elif "intrusion" in str(event_source).lower():
-            return "Intrusion Detection Alert"
-        elif "fire" in str(event_source).lower():
-            return "Fire Detection Alert"
-        elif "motion" in str(event_source).lower():
-            return "Motion Detection Alert"
+        # If no specific event type found, try to infer from other fields in
+        # one pass, keeping the keyword priority order of EVENT_KEYWORDS
+        found = set(EVENT_KEYWORD_PATTERN.findall(str(event_source).lower()))
+        for keyword, label in EVENT_KEYWORDS:
+            if keyword in found:
+                return label
         
         # Default fallback
         return "Security Event"
 
+    def _build_event_message(self, event_data: Dict[str, Any]) -> str:
+        """Build the alert text for a single event."""
+        event_source = event_data.get("_source", {})
+        # Only probe the fields this event shape actually has
+        name_fields, camera_fields = _present_fields(frozenset(event_source))
+        
+        # Extract relevant fields from the event
+        timestamp = event_source.get("@timestamp", "Unknown time")
+        location = event_source.get("location", "Unknown location")
+        event_type = self._extract_event_name(event_source, name_fields)
+        
+        # Format location with Google Maps URL if coordinates available
+        formatted_location = self._format_location_with_maps(location)
+        
+        # Create alert message
+        parts = [
+            ALERT_HEADER,
+            f"📋 Type: {event_type}",
+            f"⏰ Time: {timestamp}",
+            formatted_location,
+        ]
+        
+        # Add camera info if available
+        camera_info = next((event_source[field] for field in camera_fields if event_source[field]), None)
+        if camera_info:
+            parts.append(f"📹 Camera: {camera_info}")
+        
+        message = "\n".join(parts)
+        
+        # Truncate message if too long (SMS limit is 1600 characters)
+        if len(message) > 1500:
+            message = message[:1500] + "..."
+        
+        return message
+    
+    def _log_event_result(self, event_id: Any, result: Dict[str, Any]) -> None:
+        if result.get("success"):
+            logger.info("Event alert SMS sent for event {}", event_id)
+        else:
+            # The result dict rides along as-is for structured sinks
+            logger.bind(result=result).error(
+                "Failed to send event alert SMS for event {}: {} (Message SID: {})",
+                event_id, result.get("error"), result.get("message_sid")
+            )
+
     def send_event_alert(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send an SMS alert for a specific event."""
+        """Send an SMS alert for a specific event (queued and coalesced when aiohttp is available)."""
+        if not self._initialized:
+            return NOT_INITIALIZED_RESULT
+        if aiohttp is not None:
+            try:
+                deadline = self._alert_deadline(1)
+                return self.enqueue_event(event_data).result(timeout=deadline - time.monotonic())
+            except Exception as e:
+                logger.error(f"Error sending event alert SMS: {e}")
+                return {"success": False, "error": str(e)}
+        
         try:
-            # Extract event information
-            event_source = event_data.get("_source", {})
-            event_id = event_data.get("_id", "Unknown")
-            event_index = event_data.get("_index", "Unknown")
-            
-            # Extract relevant fields from the event
-            timestamp = event_source.get("@timestamp", "Unknown time")
-            location = event_source.get("location", "Unknown location")
-            event_type = self._extract_event_name(event_source)
-            
-            # Format location with Google Maps URL if coordinates available
-            formatted_location = self._format_location_with_maps(location)
-            
-            # Create alert message
-            message = f"🚨 SECURITY ALERT 🚨\n"
-            message += f"📋 Type: {event_type}\n"
-            message += f"⏰ Time: {timestamp}\n"
-            message += f"{formatted_location}"
-            
-            # Add camera info if available
-            camera_info = event_source.get("camera_name") or event_source.get("camera_id") or event_source.get("source")
-            if camera_info:
-                message += f"\n📹 Camera: {camera_info}"
-            
-            # Truncate message if too long (SMS limit is 1600 characters)
-            if len(message) > 1500:
-                message = message[:1500] + "..."
-            
+            message = self._build_event_message(event_data)
             result = self.send_sms(message)
+            self._log_event_result(event_data.get("_id", "Unknown"), result)
+            return result
             
-            if result.get("success"):
-                logger.info(f"Event alert SMS sent for event {event_id}")
-            else:
-                error_msg = f"Failed to send event alert SMS for event {event_id}: {result.get('error')}"
-                message_sid = result.get("message_sid")
-                if message_sid:
-                    error_msg += f" (Message SID: {message_sid})"
-                logger.error(error_msg)
+        except Exception as e:
+            logger.error(f"Error creating event alert SMS: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def send_event_alerts(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send alerts for many events; with aiohttp they are queued together and sent concurrently."""
+        if not self._initialized:
+            return [NOT_INITIALIZED_RESULT] * len(events)
+        if aiohttp is None:
+            return list(self._get_pool().map(self.send_event_alert, events))
+        
+        # One deadline for the whole batch, since its alerts drain through the same bucket
+        deadline = self._alert_deadline(len(events))
+        futures = [self.enqueue_event(event) for event in events]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except Exception as e:
+                logger.error(f"Error sending event alert SMS: {e}")
+                results.append({"success": False, "error": str(e)})
+        return results
+    
+    def queue_event_alerts(self, events: List[Dict[str, Any]]) -> int:
+        """Queue alerts for many events without waiting for delivery; each result is logged as it lands."""
+        if not self._initialized:
+            return 0
+        if aiohttp is None:
+            pool = self._get_pool()
+            for event in events:
+                pool.submit(self.send_event_alert, event)
+        else:
+            for event in events:
+                self.enqueue_event(event)
+        return len(events)
+    
+    def _alert_deadline(self, count: int) -> float:
+        """Monotonic time by which count newly queued alerts should have been sent at the configured rate."""
+        # The backlog counter is read off the loop thread, so this is an estimate
+        messages = self._backlog + count + 1  # plus the burst summary
+        return time.monotonic() + EVENT_ALERT_TIMEOUT + messages / max(config.twilio.mps, 0.001)
+    
+    def enqueue_event(self, event_data: Dict[str, Any]) -> "concurrent.futures.Future":
+        """
+        Queue an event alert for the next flush. Alerts are flushed every
+        flush_interval_ms or once max_batch are waiting; the returned future
+        resolves to that event's send result.
+        """
+        return asyncio.run_coroutine_threadsafe(self._enqueue(event_data), self._ensure_loop())
+    
+    async def _enqueue(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        result = asyncio.get_running_loop().create_future()
+        self._pending.append((event_data, result))
+        self._backlog += 1
+        
+        if len(self._pending) >= self._max_batch:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+            self._flush_task = None
+            self._spawn(self._flush())
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_after_interval())
+        
+        return await result
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Start a flush task and hold a reference to it until it finishes."""
+        task = asyncio.create_task(coro)
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+        return task
+    
+    async def _drop_queued_alerts(self):
+        """Stop all flushes and fail every queued alert so waiting callers return at once."""
+        self._flush_task = None
+        tasks = list(self._flush_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        batch, self._pending = self._pending, []
+        self._fail_alerts(batch)
+        self._backlog = 0
+    
+    def _fail_alerts(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Resolve the futures of alerts that will not be sent with an error result."""
+        dropped = 0
+        for _, future in batch:
+            if not future.done():
+                future.set_result({"success": False, "error": "SMS service closed before the alert was sent"})
+                dropped += 1
+        if dropped:
+            logger.warning(f"Dropped {dropped} queued SMS alerts on close")
+    
+    async def _flush_after_interval(self):
+        await asyncio.sleep(self._flush_interval)
+        self._flush_task = None
+        await self._flush()
+    
+    async def _flush(self):
+        """Send everything queued: one summary for bursts, then each alert concurrently."""
+        # Runs on the service loop thread only, so the swap needs no lock
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        try:
+            if len(batch) > 1:
+                await self.send_batch_alert_async(len(batch), details=self._summarize_events(event for event, _ in batch))
             
+            results = await asyncio.gather(
+                *(self._send_event_alert_async(event) for event, _ in batch),
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            self._fail_alerts(batch)
+            raise
+        finally:
+            self._backlog -= len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                result = {"success": False, "error": str(result)}
+            if not future.done():
+                future.set_result(result)
+    
+    def _summarize_events(self, events) -> Optional[str]:
+        """Camera count and coordinate centre of a burst, for its summary SMS."""
+        # Pull just the summarized fields into columns in one pass over the events
+        lats = array.array("d")
+        lons = array.array("d")
+        cameras = set()
+        for event in events:
+            source = event.get("_source", {})
+            _, camera_fields = _present_fields(frozenset(source))
+            camera = next((source[field] for field in camera_fields if source[field]), None)
+            if camera:
+                cameras.add(str(camera))
+            location = source.get("location")
+            if isinstance(location, dict):
+                lat, lon = location.get("lat"), location.get("lon")
+                if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+                    lats.append(lat)
+                    lons.append(lon)
+        
+        details = []
+        if cameras:
+            details.append(f"📹 Cameras: {len(cameras)}")
+        if lats:
+            details.append(f"📍 Centre: {sum(lats) / len(lats):.6f}, {sum(lons) / len(lons):.6f}")
+        return "\n".join(details) or None
+    
+    async def _send_event_alert_async(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            message = self._build_event_message(event_data)
+            result = await self.send_sms_async(message)
+            self._log_event_result(event_data.get("_id", "Unknown"), result)
             return result
-            
         except Exception as e:
             logger.error(f"Error creating event alert SMS: {e}")
             return {"success": False, "error": str(e)}
     
+    def _build_batch_message(self, event_count: int, batch_number: Optional[int] = None,
+                             details: Optional[str] = None) -> str:
+        summary = f"{event_count} new security events detected"
+        if batch_number:
+            summary += f" (Batch #{batch_number})"
+        
+        parts = [BATCH_ALERT_HEADER, summary, f"Time: {_iso_now()}"]
+        if details:
+            parts.append(details)
+        parts.append("Check the system for details.")
+        return "\n".join(parts)
+    
+    def _log_batch_result(self, event_count: int, result: Dict[str, Any]) -> None:
+        if result.get("success"):
+            logger.info("Batch alert SMS sent for {} events", event_count)
+        else:
+            logger.bind(result=result).error(
+                "Failed to send batch alert SMS: {} (Message SID: {})",
+                result.get("error"), result.get("message_sid")
+            )
+    
     def send_batch_alert(self, event_count: int, batch_number: Optional[int] = None) -> Dict[str, Any]:
         """Send an SMS alert for a batch of events."""
         try:
-            message = f"🚨 SECURITY BATCH ALERT 🚨\n"
-            message += f"{event_count} new security events detected"
-            
-            if batch_number:
-                message += f" (Batch #{batch_number})"
-            
-            message += f"\nTime: {logger._core.handlers[0]._sink._write.__self__.name if hasattr(logger, '_core') else 'Now'}"
-            message += "\nCheck the system for details."
-            
-            result = self.send_sms(message)
-            
-            if result.get("success"):
-                logger.info(f"Batch alert SMS sent for {event_count} events")
-            else:
-                error_msg = f"Failed to send batch alert SMS: {result.get('error')}"
-                message_sid = result.get("message_sid")
-                if message_sid:
-                    error_msg += f" (Message SID: {message_sid})"
-                logger.error(error_msg)
+            result = self.send_sms(self._build_batch_message(event_count, batch_number))
+            self._log_batch_result(event_count, result)
+            return result
             
+        except Exception as e:
+            logger.error(f"Error creating batch alert SMS: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def send_batch_alert_async(self, event_count: int, batch_number: Optional[int] = None,
+                                     details: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of send_batch_alert, with optional extra summary lines."""
+        try:
+            result = await self.send_sms_async(self._build_batch_message(event_count, batch_number, details))
+            self._log_batch_result(event_count, result)
             return result
             
         except Exception as e:
@@ -220,8 +753,7 @@ class SMSService:
         """Test the Twilio connection by sending a test message."""
         try:
             if not self._initialized:
-                if not self.initialize():
-                    return False
+                return False
             
             test_message = "Test message from your security monitoring system. SMS alerts are working correctly."
             result = self.send_sms(test_message)
@@ -244,3 +776,5 @@ class SMSService:
 
 # Global SMS service instance
 sms_service = SMSService()
+if config.twilio.enabled:
+    sms_service.initialize()
@@ -2,15 +2,79 @@
 """
 Test script for Twilio WhatsApp functionality.
 Run this script to test if your WhatsApp setup is working correctly.
+Pass --mock to exercise the service against a fake Twilio client without sending anything.
 """
 
+import io
+import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from unittest.mock import MagicMock
+from dotenv import load_dotenv
 from loguru import logger
+
+MOCK_MODE = "--mock" in sys.argv
+
+# Placeholders for the settings config requires, so mock runs need no credentials
+MOCK_ENV = {
+    "FIREBASE_PROJECT_ID": "mock-project",
+    "FIREBASE_PRIVATE_KEY_ID": "mock",
+    "FIREBASE_PRIVATE_KEY": "mock",
+    "FIREBASE_CLIENT_EMAIL": "mock@mock-project.iam.gserviceaccount.com",
+    "FIREBASE_CLIENT_ID": "mock",
+    "TWILIO_ACCOUNT_SID": "AC_MOCK",
+    "TWILIO_AUTH_TOKEN": "mock-token",
+    "TWILIO_FROM_PHONE": "+15005550006",
+    "TWILIO_TO_PHONE": "+15005550006",
+    "WHATSAPP_FROM_NUMBER": "whatsapp:+14155238886",
+    "WHATSAPP_TO_NUMBER": "whatsapp:+15005550006",
+    "WHATSAPP_CONTENT_SID": "HX_MOCK",
+}
+
+if MOCK_MODE:
+    # Must run before config is imported; real .env values still take precedence
+    load_dotenv()
+    for name, value in MOCK_ENV.items():
+        if not os.environ.get(name):
+            os.environ[name] = value
+    os.environ["WHATSAPP_ENABLED"] = "true"
+
 from config import config
 from whatsapp_service import whatsapp_service
 
 
+class _PerThreadStdout:
+    """Routes print output from a thread with a capture buffer into that buffer."""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def capture(self, func):
+        """Run func with this thread's output buffered; returns (result, output)."""
+        self._local.buffer = io.StringIO()
+        try:
+            return func(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+    
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+
+def _mock_twilio_client() -> MagicMock:
+    """Fake Twilio client whose messages.create returns a canned queued message."""
+    client = MagicMock()
+    client.messages.create.return_value = MagicMock(sid="SM_MOCK_0000", status="queued")
+    return client
+
+
 def test_whatsapp_configuration():
     """Test WhatsApp configuration and connection."""
     print("=" * 60)
@@ -59,7 +123,7 @@ def test_whatsapp_service():
     try:
         # Test service initialization
         print("Testing WhatsApp service initialization...")
-        if whatsapp_service.initialize():
+        if whatsapp_service.initialize(client=_mock_twilio_client() if MOCK_MODE else None):
             print("✅ WhatsApp service initialized successfully")
         else:
             print("❌ WhatsApp service initialization failed")
@@ -173,31 +237,64 @@ def main():
     print("🔧 WHATSAPP TESTING TOOL")
     print("=" * 60)
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if MOCK_MODE:
+        print("Mock mode: using a fake Twilio client, no messages will be sent")
     print()
     
-    tests = [
+    # Setup checks run in order; the send tests are independent and run together
+    setup_tests = [
         ("Configuration Check", test_whatsapp_configuration),
-        ("Service Initialization", test_whatsapp_service),
+        ("Service Initialization", test_whatsapp_service)
+    ]
+    send_tests = [
         ("Connection Test", test_whatsapp_connection),
         ("Event Alert Test", test_event_alert),
         ("Batch Alert Test", test_batch_alert)
     ]
     
     passed_tests = 0
-    total_tests = len(tests)
+    total_tests = len(setup_tests) + len(send_tests)
     
-    for test_name, test_func in tests:
-        print(f"Running {test_name}...")
+    def report(test_name, run):
         try:
-            if test_func():
-                passed_tests += 1
+            if run():
                 print(f"✅ {test_name} PASSED")
-            else:
-                print(f"❌ {test_name} FAILED")
+                return True
+            print(f"❌ {test_name} FAILED")
         except Exception as e:
             print(f"❌ {test_name} FAILED with exception: {e}")
+        return False
+    
+    for test_name, test_func in setup_tests:
+        print(f"Running {test_name}...")
+        if report(test_name, test_func):
+            passed_tests += 1
         print()
     
+    print(f"Running {', '.join(name for name, _ in send_tests)} concurrently...")
+    print()
+    # Buffer each send test's output so concurrent tests print as whole blocks, in order
+    real_stdout = sys.stdout
+    stdout = _PerThreadStdout(real_stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(send_tests)) as executor:
+            futures = [
+                (test_name, executor.submit(stdout.capture, test_func))
+                for test_name, test_func in send_tests
+            ]
+            for test_name, future in futures:
+                def run(future=future):
+                    passed, output = future.result()
+                    sys.stdout.write(output)
+                    return passed
+                
+                if report(test_name, run):
+                    passed_tests += 1
+                print()
+    finally:
+        sys.stdout = real_stdout
+    
     print("=" * 60)
     print(f"TEST RESULTS: {passed_tests}/{total_tests} tests passed")
     
@@ -1,10 +1,104 @@
-from typing import Dict, Any, Optional
+import asyncio
+import concurrent.futures
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union
 from loguru import logger
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from urllib3.util.retry import Retry
 from config import config
 import json
 
+# Optional faster JSON encoding for template content variables
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TWILIO_POOL_MAXSIZE = 50
+TWILIO_TIMEOUT_SECONDS = 10
+FLUSH_WINDOW_SECONDS = 0.5
+# Fields tried in order for the event name
+EVENT_NAME_FIELDS = (
+    "event_name",
+    "event_type",
+    "alert_type",
+    "detection_type",
+    "incident_type",
+    "alarm_type",
+    "category",
+    "type",
+    "name",
+    "title",
+)
+# Keywords used to infer an event name, in priority order
+EVENT_KEYWORDS = (
+    ("crowd", "Crowd Detection"),
+    ("intrusion", "Intrusion Detection"),
+    ("fire", "Fire Detection"),
+    ("motion", "Motion Detection"),
+)
+EVENT_KEYWORD_PATTERN = re.compile("|".join(keyword for keyword, _ in EVENT_KEYWORDS), re.IGNORECASE)
+_STOP = object()
+# JSON for template placeholders {{1}}..{{4}} filled by event alerts, from pre-escaped values
+EVENT_CONTENT_TEMPLATE = '{{"1":{},"2":{},"3":{},"4":{}}}'
+
+
+@lru_cache(maxsize=64)
+def _normalize_whatsapp_number(number: str) -> str:
+    """Ensure WhatsApp number format (whatsapp:+<digits>)."""
+    if number.startswith('whatsapp:'):
+        return number
+    if number.startswith('+'):
+        return f'whatsapp:{number}'
+    return f'whatsapp:+{number}'
+
+
+@lru_cache(maxsize=256)
+def _json_string(value: str) -> str:
+    """JSON-escaped string literal; event types, cameras and map URLs repeat across events."""
+    return json.dumps(value)
+
+
+def _event_content_variables_json(event_type: str, location_url: str, timestamp: str, camera_info: str) -> str:
+    # Timestamps are unique per event, so only the repeating values go through the cache
+    return EVENT_CONTENT_TEMPLATE.format(
+        _json_string(str(event_type)),
+        _json_string(str(location_url)),
+        json.dumps(str(timestamp)),
+        _json_string(str(camera_info))
+    )
+
+
+def _dumps_content_variables(content_variables: Dict[str, str]) -> str:
+    if orjson is not None:
+        return orjson.dumps(content_variables).decode()
+    return json.dumps(content_variables)
+
+
+def _build_http_client() -> TwilioHttpClient:
+    """Twilio HTTP client on one keep-alive session, so sends reuse the TLS connection."""
+    http_client = TwilioHttpClient(pool_connections=True, timeout=TWILIO_TIMEOUT_SECONDS)
+    # Only retry responses where Twilio did not create the message, so a retry never double-sends
+    retry = Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=(429, 503),
+        allowed_methods=None,
+        respect_retry_after_header=True
+    )
+    http_client.session.mount(
+        "https://", HTTPAdapter(pool_connections=10, pool_maxsize=TWILIO_POOL_MAXSIZE, max_retries=retry)
+    )
+    return http_client
+
 
 class WhatsAppService:
     """Service for sending WhatsApp notifications via Twilio."""
@@ -12,9 +106,25 @@ class WhatsAppService:
     def __init__(self):
         self.client: Optional[Client] = None
         self._initialized = False
+        self._init_lock = threading.Lock()
+        # Sender, template and default recipient, read from config once in initialize()
+        self._from: Optional[str] = None
+        self._content_sid: Optional[str] = None
+        self._batch_content_sid: Optional[str] = None
+        self._to: Optional[str] = None
+        # Next free send slot under the per-sender messages-per-second cap
+        self._rate_lock = threading.Lock()
+        self._next_send_at = 0.0
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Outbound queue drained by a background thread that coalesces alert storms
+        self._outbox: "queue.Queue" = queue.Queue()
+        self._drain_thread: Optional[threading.Thread] = None
+        self._batch_number = 0
     
-    def initialize(self) -> bool:
-        """Initialize the Twilio client for WhatsApp."""
+    def initialize(self, client: Optional[Client] = None) -> bool:
+        """Initialize the Twilio client for WhatsApp (repeat calls are no-ops); a given client is used as-is."""
+        if self._initialized:
+            return True
         try:
             if not config.whatsapp.enabled:
                 logger.info("WhatsApp service is disabled")
@@ -28,7 +138,15 @@ class WhatsAppService:
                 logger.error("WhatsApp content SID not configured")
                 return False
             
-            self.client = Client(config.whatsapp.account_sid, config.whatsapp.auth_token)
+            self.client = client or Client(
+                config.whatsapp.account_sid,
+                config.whatsapp.auth_token,
+                http_client=_build_http_client()
+            )
+            self._from = config.whatsapp.from_number
+            self._content_sid = config.whatsapp.content_sid
+            self._batch_content_sid = config.whatsapp.batch_content_sid or None
+            self._to = _normalize_whatsapp_number(config.whatsapp.to_number) if config.whatsapp.to_number else None
             self._initialized = True
             logger.info("WhatsApp service initialized successfully")
             return True
@@ -37,35 +155,35 @@ class WhatsAppService:
             logger.error(f"Failed to initialize WhatsApp service: {e}")
             return False
     
-    def send_whatsapp_message(self, content_variables: Dict[str, str], to_number: Optional[str] = None) -> Dict[str, Any]:
-        """Send a WhatsApp message using Twilio Content API."""
+    def send_whatsapp_message(self, content_variables: Union[Dict[str, str], str],
+                              to_number: Optional[str] = None,
+                              content_sid: Optional[str] = None) -> Dict[str, Any]:
+        """Send a WhatsApp message using Twilio Content API (variables as a dict or pre-encoded JSON)."""
         try:
             if not self._initialized:
-                if not self.initialize():
-                    return {"success": False, "error": "WhatsApp service not initialized"}
+                # Double-checked so concurrent first sends build a single client
+                with self._init_lock:
+                    if not self._initialized and not self.initialize():
+                        return {"success": False, "error": "WhatsApp service not initialized"}
             
             if not self.client:
                 return {"success": False, "error": "Twilio client not available"}
             
             # Use provided phone number or default from config
-            recipient = to_number or config.whatsapp.to_number
+            recipient = _normalize_whatsapp_number(to_number) if to_number else self._to
             if not recipient:
                 return {"success": False, "error": "No recipient WhatsApp number configured"}
             
-            # Ensure WhatsApp number format
-            if not recipient.startswith('whatsapp:'):
-                if recipient.startswith('+'):
-                    recipient = f'whatsapp:{recipient}'
-                else:
-                    recipient = f'whatsapp:+{recipient}'
-            
             # Convert content variables to JSON string
-            content_vars_json = json.dumps(content_variables)
+            if isinstance(content_variables, str):
+                content_vars_json = content_variables
+            else:
+                content_vars_json = _dumps_content_variables(content_variables)
             
             # Send WhatsApp message
             message = self.client.messages.create(
-                from_=config.whatsapp.from_number,
-                content_sid=config.whatsapp.content_sid,
+                from_=self._from,
+                content_sid=content_sid or self._content_sid,
                 content_variables=content_vars_json,
                 to=recipient
             )
@@ -96,36 +214,162 @@ class WhatsAppService:
             logger.error(f"Unexpected error sending WhatsApp: {e}")
             return {"success": False, "error": str(e)}
     
+    def _reserve_send_slot(self) -> float:
+        """Reserve the next send time under the MPS cap; returns how long to wait for it."""
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_send_at)
+            self._next_send_at = slot + 1 / max(config.whatsapp.mps, 0.001)
+            return slot - now
+    
+    def _get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._init_lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, config.whatsapp.max_concurrency), thread_name_prefix="twilio-whatsapp"
+                )
+            return self._pool
+    
+    def _send_event_alert_paced(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        delay = self._reserve_send_slot()
+        if delay > 0:
+            time.sleep(delay)
+        return self.send_event_alert(event_data)
+    
+    def send_event_alerts(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send alerts for many events through the outbox and wait for their results."""
+        futures = [self.enqueue_event(event) for event in events]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=60))
+            except Exception as e:
+                logger.error(f"Error sending event alert WhatsApp: {e}")
+                results.append({"success": False, "error": str(e)})
+        return results
+    
+    def enqueue_event(self, event_data: Dict[str, Any]) -> concurrent.futures.Future:
+        """
+        Queue an event alert and return at once. Alerts arriving within a flush
+        window are sent individually, or as one batch alert when more than
+        coalesce_threshold arrive and a batch template is configured; the
+        future resolves to the send result.
+        """
+        future = concurrent.futures.Future()
+        with self._init_lock:
+            if self._drain_thread is None:
+                self._drain_thread = threading.Thread(
+                    target=self._drain_outbox, name="whatsapp-outbox", daemon=True
+                )
+                self._drain_thread.start()
+        self._outbox.put((event_data, future))
+        return future
+    
+    def flush(self):
+        """Block until every queued alert has been sent."""
+        self._outbox.join()
+    
+    def _drain_outbox(self):
+        while True:
+            item = self._outbox.get()
+            if item is _STOP:
+                self._outbox.task_done()
+                return
+            
+            # Collect whatever else arrives within the flush window
+            window = [item]
+            stop = False
+            deadline = time.monotonic() + FLUSH_WINDOW_SECONDS
+            while not stop:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._outbox.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    window.append(item)
+            
+            try:
+                self._send_window(window)
+            finally:
+                for _ in window:
+                    self._outbox.task_done()
+            if stop:
+                self._outbox.task_done()
+                return
+    
+    def _send_window(self, window):
+        events = [event for event, _ in window]
+        try:
+            # Coalescing needs a batch template; the event template can't carry a count
+            if self._batch_content_sid and len(events) > config.whatsapp.coalesce_threshold:
+                self._batch_number += 1
+                result = self.send_batch_alert(len(events), self._batch_number)
+                results = [dict(result, coalesced=True) for _ in events]
+            else:
+                results = list(self._get_pool().map(self._send_event_alert_paced, events))
+        except Exception as e:
+            logger.error(f"Error sending queued WhatsApp alerts: {e}")
+            results = [{"success": False, "error": str(e)} for _ in events]
+        
+        for (_, future), result in zip(window, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def send_event_alert_async(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send an event alert without blocking the event loop, paced to the MPS cap."""
+        delay = self._reserve_send_slot()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await asyncio.to_thread(self.send_event_alert, event_data)
+    
+    async def send_events_bulk(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send alerts for many events concurrently from async code."""
+        sem = asyncio.Semaphore(max(1, config.whatsapp.max_concurrency))
+        
+        async def send_one(event_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with sem:
+                return await self.send_event_alert_async(event_data)
+        
+        return await asyncio.gather(*(send_one(event) for event in events))
+    
+    def close(self):
+        """Send anything still queued, then stop the outbox and worker threads."""
+        with self._init_lock:
+            drain_thread, self._drain_thread = self._drain_thread, None
+        if drain_thread is not None:
+            self._outbox.put(_STOP)
+            drain_thread.join(timeout=60)
+        
+        # The drain may still use the pool, so only take it once the drain is done
+        with self._init_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+    
     def _extract_event_name(self, event_source: Dict[str, Any]) -> str:
         """Extract the most specific event name/type from the event data."""
-        # Try multiple possible field names for event type/name
-        possible_fields = [
-            "event_name",
-            "event_type", 
-            "alert_type",
-            "detection_type",
-            "incident_type",
-            "alarm_type",
-            "category",
-            "type",
-            "name",
-            "title"
-        ]
-        
-        for field in possible_fields:
-            value = event_source.get(field)
-            if value and isinstance(value, str) and value.strip():
-                return value.strip()
+        name = next(
+            (stripped for field in EVENT_NAME_FIELDS
+             if isinstance(value := event_source.get(field), str) and (stripped := value.strip())),
+            None
+        )
+        if name:
+            return name
         
-        # If no specific event type found, try to infer from other fields
-        if "crowd" in str(event_source).lower():
-            return "Crowd Detection"
-        elif "intrusion" in str(event_source).lower():
-            return "Intrusion Detection"
-        elif "fire" in str(event_source).lower():
-            return "Fire Detection"
-        elif "motion" in str(event_source).lower():
-            return "Motion Detection"
+        # If no specific event type found, try to infer from the string values
+        # without rendering the whole event
+        found = set()
+        for value in event_source.values():
+            if isinstance(value, str):
+                found.update(match.lower() for match in EVENT_KEYWORD_PATTERN.findall(value))
+        for keyword, label in EVENT_KEYWORDS:
+            if keyword in found:
+                return label
         
         # Default fallback
         return "Security Event"
@@ -168,12 +412,8 @@ class WhatsAppService:
             
             # Based on your template example, prepare content variables
             # You'll need to adjust these variable numbers (1, 2, 3, 4) based on your actual WhatsApp template
-            content_variables = {
-                "1": event_type,        # {{1}} - Event type
-                "2": location_url,      # {{2}} - Location URL  
-                "3": timestamp,         # {{3}} - Timestamp
-                "4": camera_info        # {{4}} - Camera info
-            }
+            # {{1}} event type, {{2}} location URL, {{3}} timestamp, {{4}} camera info
+            content_variables = _event_content_variables_json(event_type, location_url, timestamp, camera_info)
             
             result = self.send_whatsapp_message(content_variables)
             
@@ -205,7 +445,7 @@ class WhatsAppService:
                 "2": batch_info         # Batch information
             }
             
-            result = self.send_whatsapp_message(content_variables)
+            result = self.send_whatsapp_message(content_variables, content_sid=self._batch_content_sid)
             
             if result.get("success"):
                 logger.info(f"Batch alert WhatsApp sent for {event_count} events")
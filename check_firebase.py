@@ -6,6 +6,10 @@ from firebase_client import firebase_client
 from config import config
 from loguru import logger
 
+# Fields this script prints; "@timestamp" needs backticks to be a valid field path
+SAMPLE_FIELD_PATHS = ["source_index", "source_id", "event_name", "`@timestamp`", "created_at"]
+SAMPLE_SIZE = 3
+
 async def check_firebase_data():
     """Check what's actually stored in Firebase."""
     print("=" * 60)
@@ -52,9 +56,9 @@ async def check_firebase_data():
             # Try a different approach - get all documents
             print("\nTrying to get all documents...")
             try:
-                # This is a more direct approach
+                # This is a more direct approach; fetch only the fields we print
                 collection_ref = firebase_client.db.collection(config.firebase.collection)
-                docs = collection_ref.limit(10).stream()
+                docs = collection_ref.select(SAMPLE_FIELD_PATHS).limit(SAMPLE_SIZE).stream()
                 
                 doc_count = 0
                 for doc in docs:
@@ -62,9 +66,7 @@ async def check_firebase_data():
                     doc_data = doc.to_dict()
                     print(f"\nDocument {doc_count}:")
                     print(f"  Document ID: {doc.id}")
-                    print(f"  Keys: {list(doc_data.keys())}")
-                    if doc_count >= 3:  # Show only first 3
-                        break
+                    print(f"  Sampled fields present: {list(doc_data.keys())}")
                 
                 print(f"\nTotal documents found: {doc_count}")
                 
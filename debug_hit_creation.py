@@ -1,10 +1,15 @@
 """
 Debug script to see exactly what's happening with ElasticsearchHit creation.
 """
+from itertools import islice
+
 from elasticsearch_client import elasticsearch_client
 from models import ElasticsearchQuery, ElasticsearchSearchResponse
 from config import config
 
+DEBUG_HIT_COUNT = 2
+
+
 def debug_hit_creation():
     """Debug the ElasticsearchHit creation process."""
     print("=" * 60)
@@ -21,7 +26,7 @@ def debug_hit_creation():
         query = ElasticsearchQuery(
             index=config.elasticsearch.index,
             query={"match_all": {}},
-            size=2  # Get 2 documents for debugging
+            size=DEBUG_HIT_COUNT  # Only a couple of documents are inspected
         )
         
         # Get raw response
@@ -49,7 +54,8 @@ def debug_hit_creation():
         search_response = ElasticsearchSearchResponse(**response)
         
         print("Getting documents...")
-        documents = search_response.get_documents()
+        # Only build the hits we inspect
+        documents = list(islice(search_response.iter_documents(), DEBUG_HIT_COUNT))
         
         print(f"Created {len(documents)} ElasticsearchHit objects")
         
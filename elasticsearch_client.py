@@ -1,7 +1,7 @@
 """
 Elasticsearch client for data ingestion (synchronous version).
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import NotFoundError, ConnectionError, RequestError
@@ -10,6 +10,25 @@ from loguru import logger
 from config import config
 from models import ElasticsearchSearchResponse, ElasticsearchHit, ElasticsearchQuery
 
+# Optional: decode search responses with orjson instead of the stdlib json module
+try:
+    import orjson
+    from elastic_transport import JsonSerializer
+
+    class OrjsonSerializer(JsonSerializer):
+        """JSON serializer for the Elasticsearch client backed by orjson."""
+
+        def loads(self, data: bytes) -> Any:
+            return orjson.loads(data)
+
+        def dumps(self, data: Any) -> bytes:
+            # Pre-encoded bodies pass through unchanged
+            if isinstance(data, (str, bytes)):
+                return super().dumps(data)
+            return orjson.dumps(data, default=self.default)
+except ImportError:
+    OrjsonSerializer = None
+
 
 class ElasticsearchClient:
     """Client for interacting with Elasticsearch."""
@@ -28,6 +47,8 @@ class ElasticsearchClient:
                 "timeout": 30,
                 "max_retries": 3,
                 "retry_on_timeout": True,
+                # Gzip request/response bodies; event _source payloads are text-heavy
+                "http_compress": True,
             }
             
             # Add authentication if provided
@@ -37,6 +58,9 @@ class ElasticsearchClient:
                     config.elasticsearch.password
                 )
             
+            if OrjsonSerializer is not None:
+                connection_params["serializer"] = OrjsonSerializer()
+            
             self.client = Elasticsearch(**connection_params)
             
             # Test connection with a simple operation
@@ -106,7 +130,9 @@ class ElasticsearchClient:
                 search_params["body"]["sort"] = query.sort
             
             response = self.client.search(**search_params)
-            search_response = ElasticsearchSearchResponse(**response)
+            # Elasticsearch already guarantees the response shape; skip
+            # per-field validation of every hit on the polling hot path.
+            search_response = ElasticsearchSearchResponse.construct(**response)
             
             return search_response.get_documents()
             
@@ -123,8 +149,8 @@ class ElasticsearchClient:
         """Get documents from the last N minutes."""
         try:
             # Calculate timestamp for N minutes ago
-            cutoff_time = datetime.utcnow() - timedelta(minutes=minutes_back)
-            timestamp_str = cutoff_time.strftime("%Y-%m-%dT%H:%M:%S")
+            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes_back)
+            timestamp_str = cutoff_time.replace(tzinfo=None).isoformat(timespec="seconds")
             
             # Build query for recent documents
             query = ElasticsearchQuery(
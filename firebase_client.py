@@ -2,8 +2,9 @@
 Firebase client for data storage.
 """
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 import firebase_admin
 from firebase_admin import credentials, firestore
 from firebase_admin.exceptions import FirebaseError
@@ -12,6 +13,24 @@ from loguru import logger
 from config import config
 from models import FirebaseDocument, ElasticsearchHit
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Collection stats stream up to 1000 documents, so reuse them for a while
+COLLECTION_STATS_TTL_SECONDS = 300
+
+
+def _dumps(value: Any) -> str:
+    """JSON-encode a value Firestore can't store natively, preferring orjson."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(value, default=str)
+
 
 class FirebaseClient:
     """Client for interacting with Firebase Firestore."""
@@ -20,6 +39,8 @@ class FirebaseClient:
         self.app: Optional[firebase_admin.App] = None
         self.db: Optional[firestore.Client] = None
         self.is_initialized = False
+        # collection name -> (fetched at, stats)
+        self._stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
     
     def initialize(self) -> bool:
         """Initialize Firebase Admin SDK."""
@@ -50,17 +71,21 @@ class FirebaseClient:
     def _convert_elasticsearch_hit_to_firebase_document(
         self,
         hit: ElasticsearchHit,
-        collection_name: str
+        collection_name: str,
+        now: Optional[datetime] = None
     ) -> FirebaseDocument:
         """Convert Elasticsearch hit to Firebase document."""
         # Handle cases where attributes might not be available
         index_name = getattr(hit, '_index', 'unknown_index')
         doc_id = getattr(hit, '_id', 'unknown_id')
         source_data = getattr(hit, '_source', {})
+        now = now or datetime.utcnow()
         
         return FirebaseDocument(
             id=f"{index_name}_{doc_id}",  # Create unique ID
             data=source_data,
+            created_at=now,
+            updated_at=now,
             source_index=index_name,
             source_id=doc_id
         )
@@ -74,7 +99,7 @@ class FirebaseClient:
             if isinstance(value, datetime):
                 firestore_data[key] = value
             elif not self._is_firestore_compatible(value):
-                firestore_data[key] = json.dumps(value, default=str)
+                firestore_data[key] = _dumps(value)
         
         return firestore_data
     
@@ -138,6 +163,8 @@ class FirebaseClient:
             # Firestore batch limit is 500 operations
             batch_size = 500
             successful_stores = 0
+            # One collection reference for every document in every batch
+            coll_ref = self.db.collection(collection_name)
             
             for i in range(0, len(documents), batch_size):
                 batch = self.db.batch()
@@ -146,9 +173,8 @@ class FirebaseClient:
                 for document in batch_documents:
                     firestore_data = self._prepare_document_for_firestore(document)
                     
-                    doc_ref = self.db.collection(collection_name)
-                    if document.id:
-                        doc_ref = doc_ref.document(document.id)
+                    # Auto-generate an ID when the document has none
+                    doc_ref = coll_ref.document(document.id) if document.id else coll_ref.document()
                     
                     batch.set(doc_ref, firestore_data)
                 
@@ -175,11 +201,12 @@ class FirebaseClient:
             if not hits:
                 return 0
             
-            # Convert hits to Firebase documents
-            firebase_documents = []
-            for hit in hits:
-                document = self._convert_elasticsearch_hit_to_firebase_document(hit, collection_name)
-                firebase_documents.append(document)
+            # Convert hits to Firebase documents, stamped with one batch timestamp
+            now = datetime.utcnow()
+            firebase_documents = [
+                self._convert_elasticsearch_hit_to_firebase_document(hit, collection_name, now)
+                for hit in hits
+            ]
             
             # Store documents
             return await self.store_documents_batch(firebase_documents, collection_name)
@@ -264,33 +291,47 @@ class FirebaseClient:
             return False
     
     async def get_collection_stats(self, collection_name: str) -> Dict[str, Any]:
-        """Get basic statistics about a collection."""
+        """Get basic statistics about a collection (cached for COLLECTION_STATS_TTL_SECONDS)."""
         try:
             if not self.is_initialized or not self.db:
                 raise Exception("Firebase client not initialized")
             
+            cached = self._stats_cache.get(collection_name)
+            if cached is not None and time.monotonic() - cached[0] < COLLECTION_STATS_TTL_SECONDS:
+                return cached[1]
+            
             # Get a sample of documents to estimate collection size
             docs = self.db.collection(collection_name).limit(1000).stream()
             doc_count = sum(1 for _ in docs)
             
-            return {
+            stats = {
                 "collection_name": collection_name,
                 "estimated_document_count": doc_count,
                 "last_checked": datetime.utcnow()
             }
+            self._stats_cache[collection_name] = (time.monotonic(), stats)
+            return stats
             
         except Exception as e:
             logger.error(f"Failed to get collection stats: {e}")
             return {}
     
+    def invalidate_stats_cache(self, collection_name: Optional[str] = None):
+        """Drop cached collection stats, for one collection or all of them."""
+        if collection_name is None:
+            self._stats_cache.clear()
+        else:
+            self._stats_cache.pop(collection_name, None)
+    
     def test_connection(self) -> bool:
         """Test the Firebase connection."""
         try:
             if not self.is_initialized or not self.db:
                 return False
             
-            # Try to access a collection (this will fail if not authenticated)
-            collections = self.db.collections()
+            # One small point read with a bounded deadline; it fails if not
+            # authenticated or unreachable, and works whether or not the doc exists
+            self.db.collection("_healthcheck").document("ping").get(timeout=2.0)
             return True
             
         except Exception as e:
@@ -2,7 +2,7 @@
 Data models for the Elasticsearch to Firebase pipeline.
 """
 from datetime import datetime
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterator, Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -43,27 +43,31 @@ class ElasticsearchSearchResponse(BaseModel):
     _shards: Dict[str, Any]
     hits: Dict[str, Any]
     
-    def get_documents(self) -> List[ElasticsearchHit]:
-        """Extract documents from the search response."""
-        documents = []
+    def iter_documents(self) -> Iterator["SimpleHit"]:
+        """Yield documents from the search response one at a time."""
         for hit_data in self.hits.get("hits", []):
             try:
-                # Create a simple object that behaves like ElasticsearchHit
-                class SimpleHit:
-                    def __init__(self, hit_data):
-                        self._index = hit_data.get("_index", "")
-                        self._id = hit_data.get("_id", "")
-                        self._score = hit_data.get("_score")
-                        self._source = hit_data.get("_source", {})
-                        self._type = hit_data.get("_type")
-                
-                hit = SimpleHit(hit_data)
-                documents.append(hit)
+                yield SimpleHit(hit_data)
             except Exception as e:
                 print(f"Error creating ElasticsearchHit: {e}")
                 print(f"Hit data keys: {list(hit_data.keys())}")
                 raise
-        return documents
+    
+    def get_documents(self) -> List[ElasticsearchHit]:
+        """Extract documents from the search response."""
+        return list(self.iter_documents())
+
+
+class SimpleHit:
+    """Lightweight object that behaves like ElasticsearchHit."""
+    __slots__ = ("_index", "_id", "_score", "_source", "_type")
+    
+    def __init__(self, hit_data: Dict[str, Any]):
+        self._index = hit_data.get("_index", "")
+        self._id = hit_data.get("_id", "")
+        self._score = hit_data.get("_score")
+        self._source = hit_data.get("_source", {})
+        self._type = hit_data.get("_type")
 
 
 class FirebaseDocument(BaseModel):